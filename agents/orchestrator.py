@@ -1,23 +1,87 @@
 import logging
-import json
+import orjson
 from pathlib import Path
 import asyncio
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
 from typing_extensions import TypedDict
 from langgraph.graph import StateGraph, START, END
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright, Route
 from llm.groq_client import GroqClientAsync  # async variant
+from llm.prompts import PROMPT_GENERATE_SELECTORS_SYSTEM, render_generate_selectors_user
 from web_selectors.selector_manager import SelectorManager
-from utils.parser import html_to_text, extract_forms
-from utils.io import save_json_atomic
+from utils.parser import extract_forms
+from utils.io import save_json_atomic_async
+from utils.llm_cache import LLMCache
 from typing import Annotated
+from urllib.parse import urljoin
 import operator
 import csv
+import re
 
 logger = logging.getLogger(__name__)
 
-
-def save_form_fields_csv(forms_data, csv_path: Path):
+# Text-based selector strategies tried for every candidate that has visible text
+_TEXT_SELECTOR_TEMPLATES = (
+    # XPath text match with element type hints
+    '//button[contains(text(),"{t}")]',
+    '//a[contains(text(),"{t}")]',
+    '//input[@value="{t}"]',
+    '//*[text()="{t}"]',
+    # CSS selectors for common button/link patterns
+    'a:has-text("{t}")',
+    'button:has-text("{t}")',
+    '[role="button"]:has-text("{t}")',
+    # Additional text-matching selectors
+    '//*[contains(text(),"{t}")]',
+    '//*[normalize-space()="{t}"]',
+    '[title="{t}"]',
+)
+
+# Visibility, enabled state, bounding box and href of an element in one evaluate() call
+_ELEMENT_STATE_JS = """el => {
+    const r = el.getBoundingClientRect();
+    const cs = getComputedStyle(el);
+    return {
+        visible: r.width > 0 && r.height > 0 && cs.visibility !== 'hidden' && cs.display !== 'none',
+        enabled: !el.disabled,
+        href: el.getAttribute('href'),
+        bbox: {x: r.x, y: r.y, width: r.width, height: r.height}
+    };
+}"""
+
+# Rendered text and full markup of the page after a navigation, in one evaluate() call
+_PAGE_SNAPSHOT_JS = """() => ({
+    text: document.body ? document.body.innerText : '',
+    html: document.documentElement.outerHTML
+})"""
+
+# Requests that never affect the DOM we click through. Stylesheets stay
+# allowed here because visibility and bounding-box checks depend on CSS.
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+
+# Per-probe wait; misses are cheap because probes run concurrently and
+# _try_selectors as a whole is bounded by selector_budget
+_PROBE_TIMEOUT_MS = 1500
+
+# Pages carrying a <form> are worth extracting while classification is in flight
+_FORM_TAG_RE = re.compile(r"<form\b", re.IGNORECASE)
+
+
+def _text_selector(text: str) -> str:
+    """
+    Selector reported, and recorded in already_clicked, for a click made
+    through the composite role/title/aria-label locator for `text`; a plain
+    Playwright text selector that finds the same button or link again.
+    """
+    return f"text={text}"
+
+
+# Candidate keys that map directly onto an attribute selector (data-* are matched by prefix)
+_ATTR_SELECTOR_KEYS = frozenset({"aria-label", "role", "title", "name", "for", "placeholder"})
+
+
+def save_form_fields_csv(forms_data, csv_path: Path, append: bool = False):
+    """Write the fields of forms_data to csv_path, appending when append is set."""
     rows = []
     for form in forms_data:
         fields = form.get("parsed_forms", [])
@@ -29,9 +93,11 @@ def save_form_fields_csv(forms_data, csv_path: Path):
             rows.append([name, ftype, options_str])
 
     csv_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(csv_path, mode="w", newline="", encoding="utf-8") as f:
+    write_header = not append or not csv_path.exists()
+    with open(csv_path, mode="a" if append else "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
-        writer.writerow(["field_name", "type", "options"])
+        if write_header:
+            writer.writerow(["field_name", "type", "options"])
         writer.writerows(rows)
 
 
@@ -53,17 +119,64 @@ class GraphState(TypedDict, total=False):
     runtime: Annotated[Dict[str, Any], operator.ior]
     already_clicked: Annotated[List[str], operator.add]     
     visited_urls: Annotated[List[str], operator.add]         
+    # O(1) membership mirrors of the lists above; stripped before invoke_start returns
+    already_clicked_set: Annotated[Set[str], operator.or_]
+    visited_urls_set: Annotated[Set[str], operator.or_]
     intermediate_visits: Annotated[int, operator.add]  
 
 
 class AsyncLangGraphOrchestrator:
-    def __init__(self, groq: GroqClientAsync, human_in_loop: bool = False):
-        self.groq = groq
+    def __init__(self, groq: GroqClientAsync, human_in_loop: bool = False, context_pool_size: int = 4, probe_concurrency: int = 6,
+                 selector_budget: float = 30.0, llm_cache_path: Optional[Path] = Path("data") / "llm_cache.json",
+                 browser: Optional[Browser] = None, run_name: Optional[str] = None, out_dir: Path = Path("data"),
+                 append_form_csv: bool = False, launch_browser: Optional[Callable[[], Awaitable[Browser]]] = None,
+                 ctx_pool: "Optional[asyncio.Queue[BrowserContext]]" = None,
+                 probe_sem: Optional[asyncio.Semaphore] = None):
+        # Every groq.* call (and LLM-generated selectors) goes through a shared
+        # sha256-keyed cache that persists across runs when llm_cache_path is set;
+        # an LLMCache passed in (see spawn) is shared as-is
+        self.groq = groq if isinstance(groq, LLMCache) else LLMCache(groq, llm_cache_path)
         self.human_in_loop = human_in_loop
+        # Suffix for this run's runtime snapshot files, so concurrent runs keep their own
+        self.run_name = run_name
+        # Where runtime snapshots and form_fields.csv are written
+        self.out_dir = Path(out_dir)
+        # Set by batch callers that truncate form_fields.csv once up front;
+        # otherwise the first form of each run starts the file afresh
+        self.append_form_csv = append_form_csv
         self.selector_manager = SelectorManager()
-        
-        # Cache for LLM-generated selectors to avoid repeated calls
-        self.selector_cache = {}
+
+        # One Playwright driver + Chromium process for the orchestrator's lifetime;
+        # each _try_selectors call borrows a BrowserContext from the pool. A
+        # browser passed in by the caller, or one obtained through its
+        # launch_browser, is used as-is and left open by aclose
+        self._pw: Optional[Playwright] = None
+        self._browser: Optional[Browser] = browser
+        self._launch_browser = launch_browser
+        self._owns_browser = browser is None and launch_browser is None
+        self._browser_lock = asyncio.Lock()
+        self._ctx_pool: "asyncio.Queue[BrowserContext]" = (
+            ctx_pool if ctx_pool is not None else asyncio.Queue(maxsize=context_pool_size)
+        )
+
+        # Bounds how many wait_for_selector probes run at once across calls
+        self._probe_sem = probe_sem if probe_sem is not None else asyncio.Semaphore(probe_concurrency)
+        # Hard wall-time cap on one _try_selectors call, bad LLM output included
+        self.selector_budget = selector_budget
+
+        # Full page HTML keyed by URL. Kept out of GraphState so multi-MB strings
+        # are not carried through LangGraph's state merges; nodes that need the
+        # markup (form parsing, next-button detection) look it up via _page_html
+        self._html_by_url: Dict[str, str] = {}
+
+        # Classification calls started speculatively as soon as a navigation
+        # lands, keyed by URL and awaited by classify_page_node
+        self._pending_classify: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+        # Form extraction and next/submit lookups started alongside classification
+        # of a page with a <form>, awaited by extract_form_fields_node and (for
+        # multi-step forms) simulate_form_fill_node
+        self._pending_extract: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+        self._pending_next: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
 
         # Initialize the graph
         builder = StateGraph(GraphState)
@@ -115,106 +228,251 @@ class AsyncLangGraphOrchestrator:
 
         self.graph = builder.compile()
         
-    async def _get_llm_selectors(self, html: str, button_text: str) -> List[Dict[str, str]]:
-        """Get selectors from LLM for a given button text and HTML context"""
-        
-        cache_key = f"{button_text}"
-        if cache_key in self.selector_cache:
-            return self.selector_cache[cache_key]
-            
-        # Prepare prompt for the LLM
-        prompt = {
-            "role": "user",
-            "content": f"""Given this button text: "{button_text}"
-            Generate effective CSS and XPath selectors to find the button element. The selectors should be robust and consider different potential HTML structures.
-            Consider using multiple approaches:
-            1. Text-based selectors (exact and partial matches)
-            2. Button/link specific selectors
-            3. Role-based selectors
-            4. Class/ID based selectors if consistent patterns are found
-            5. Parent-child relationships if helpful
-
-            Format your response as a JSON array of objects with 'selector' and 'type' fields. Example:
-            [
-                {{"selector": "//button[contains(text(), 'Apply Now')]", "type": "xpath"}},
-                {{"selector": "button:has-text('Apply Now')", "type": "css"}}
-            ]
-
-            Focus on these selector patterns:
-            - XPath: exact text match: //button[text()='{button_text}']
-            - XPath: contains text: //button[contains(text(), '{button_text}')]
-            - XPath: normalize-space: //button[normalize-space()='{button_text}']
-            - XPath: case-insensitive: //button[contains(translate(text(),'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'{button_text.lower()}')]
-            - CSS: Playwright specific: button:has-text('{button_text}')
-            - CSS: with role: [role='button']:has-text('{button_text}')
-            - Combined: Multiple attributes: //button[@type='submit'][contains(text(), '{button_text}')]"""}
-        
+    async def _get_llm_selectors(self, button_text: str) -> List[Dict[str, str]]:
+        """Get selectors from LLM for a given button text"""
         try:
-            llm_result = await self.groq.raw_completion({"messages": [prompt]})
-            selectors = json.loads(llm_result['choices'][0]['message']['content'])
-            
-            # Transform the selectors into our expected format
-            formatted_selectors = []
-            for sel in selectors:
-                formatted_selectors.append({
-                    "selector": sel["selector"],
-                    "text": button_text,
-                    "source": "llm",
-                    "selector_type": sel["type"]
-                })
-            
-            # Cache the results
-            self.selector_cache[cache_key] = formatted_selectors
-            return formatted_selectors
+            return await self.groq.get_or_compute(
+                "llm_selectors", lambda: self._generate_llm_selectors(button_text), button_text=button_text
+            )
         except Exception as e:
             logger.error(f"Error getting LLM selectors: {str(e)}")
             return []
 
+    async def _generate_llm_selectors(self, button_text: str) -> List[Dict[str, str]]:
+        # The static instructions go in the system message so the provider can
+        # reuse its prompt-prefix cache; only the button text varies per call
+        messages = [
+            {"role": "system", "content": PROMPT_GENERATE_SELECTORS_SYSTEM},
+            {"role": "user", "content": render_generate_selectors_user(button_text=button_text)},
+        ]
+        
+        llm_result = await self.groq.raw_completion({"messages": messages})
+        selectors = orjson.loads(llm_result['choices'][0]['message']['content'])
+        
+        # Transform the selectors into our expected format
+        formatted_selectors = []
+        for sel in selectors:
+            formatted_selectors.append({
+                "selector": sel["selector"],
+                "text": button_text,
+                "source": "llm",
+                "selector_type": sel["type"]
+            })
+        return formatted_selectors
+
+    def spawn(self, run_name: Optional[str] = None, append_form_csv: bool = False) -> "AsyncLangGraphOrchestrator":
+        """
+        Orchestrator for one of several concurrent runs. It has its own per-URL
+        HTML and speculative-call maps, and shares this one's LLM cache, browser,
+        context pool and probe limit; only this orchestrator needs aclose.
+        """
+        return AsyncLangGraphOrchestrator(
+            self.groq,
+            human_in_loop=self.human_in_loop,
+            selector_budget=self.selector_budget,
+            run_name=run_name,
+            out_dir=self.out_dir,
+            append_form_csv=append_form_csv,
+            launch_browser=self._ensure_browser,
+            ctx_pool=self._ctx_pool,
+            probe_sem=self._probe_sem,
+        )
+
+    def _snapshot_path(self, name: str) -> Path:
+        suffix = f"_{self.run_name}" if self.run_name else ""
+        return self.out_dir / f"{name}{suffix}.json"
+
+    async def _ensure_browser(self) -> Browser:
+        """Lazily start Playwright and launch the shared Chromium instance."""
+        if self._launch_browser is not None:
+            return await self._launch_browser()
+        async with self._browser_lock:
+            if self._browser is None:
+                self._pw = await async_playwright().start()
+                self._browser = await self._pw.chromium.launch(headless=True)
+        return self._browser
+
+    async def _new_context(self, blocked_resource_types=BLOCKED_RESOURCE_TYPES, **kwargs) -> BrowserContext:
+        """Create a context on the shared browser that aborts the given resource types."""
+        browser = await self._ensure_browser()
+        context = await browser.new_context(**kwargs)
+        if blocked_resource_types:
+            # Registered once per context (not per page) so pooled contexts keep it
+            async def _block(route: Route) -> None:
+                if route.request.resource_type in blocked_resource_types:
+                    await route.abort()
+                else:
+                    await route.continue_()
+
+            await context.route("**/*", _block)
+        return context
+
+    async def _acquire_context(self) -> BrowserContext:
+        """Take a pooled BrowserContext, creating a new one if the pool is empty."""
+        try:
+            return self._ctx_pool.get_nowait()
+        except asyncio.QueueEmpty:
+            return await self._new_context(viewport={'width': 1920, 'height': 1080})
+
+    async def _release_context(self, context: BrowserContext) -> None:
+        """Reset a context and return it to the pool, closing it if the pool is full."""
+        try:
+            await context.clear_cookies()
+            self._ctx_pool.put_nowait(context)
+        except asyncio.QueueFull:
+            await context.close()
+        except Exception as e:
+            logger.warning(f"Discarding browser context: {str(e)}")
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+    async def aclose(self) -> None:
+        """Close pooled contexts and, if the orchestrator launched them, the browser and Playwright driver."""
+        await self.groq.aflush()
+        while not self._ctx_pool.empty():
+            context = self._ctx_pool.get_nowait()
+            try:
+                await context.close()
+            except Exception:
+                pass
+        if self._browser is not None and self._owns_browser:
+            await self._browser.close()
+            self._browser = None
+        if self._pw is not None:
+            await self._pw.stop()
+            self._pw = None
+
+
+    @staticmethod
+    def _state_set(state: GraphState, key: str) -> Set[str]:
+        """Set view of a list-valued state key, built from the list if the caller did not seed it."""
+        seen = state.get(f"{key}_set")
+        return set(state.get(key, [])) if seen is None else seen
+
+    @classmethod
+    def _click_updates(cls, state: GraphState, nav_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        State update recording a successful click, for a node's return value.
+        The reducers append these to already_clicked/visited_urls and their sets;
+        state itself is never mutated, since LangGraph hands nodes its channel values.
+        """
+        sel, nav_url = nav_result["selector"], nav_result["url"]
+        new_url = nav_url not in cls._state_set(state, "visited_urls")
+        return {
+            "already_clicked": [sel],
+            "already_clicked_set": {sel},
+            "visited_urls": [nav_url] if new_url else [],
+            "visited_urls_set": {nav_url},
+        }
+
+    def _speculate_classification(self, url: str, snippet: str) -> None:
+        """Start classifying a freshly loaded page while the graph transitions to classify_page_node."""
+        self._pending_classify[url] = asyncio.create_task(
+            self.groq.classify_form_or_intermediate(snippet=snippet, url=url, html=self._html_by_url.get(url, ""))
+        )
+
+    def _speculate_form(self, url: str, snippet: str, html: str) -> None:
+        """Start form extraction and the next/submit lookup for url unless already running."""
+        if url not in self._pending_extract:
+            self._pending_extract[url] = asyncio.create_task(self.groq.extract_form_fields(snippet=snippet, html=html))
+        if url not in self._pending_next:
+            self._pending_next[url] = asyncio.create_task(self.groq.find_next_or_submit_button(html=html, snippet=snippet))
+
+    @staticmethod
+    def _discard(task: "asyncio.Task") -> None:
+        """Cancel a speculative task nobody will await, retrieving any error it already raised."""
+        if task.done():
+            if not task.cancelled():
+                task.exception()
+        else:
+            task.cancel()
+
+    def _page_html(self, state: GraphState) -> str:
+        """HTML for the state's current page, falling back to an html key passed in directly."""
+        return self._html_by_url.get(state.get("url")) or state.get("html", "")
 
     async def invoke_start(self, url: str, html: str, snippet: str) -> Dict[str, Any]:
+        self._html_by_url[url] = html
         state: GraphState = {
             "url": url,
-            "html": html,
             "snippet": snippet,
             "actions": [],
             "forms": [],
             "runtime": {},
             "already_clicked": [],
             "visited_urls": [url],
+            "already_clicked_set": set(),
+            "visited_urls_set": {url},
             "intermediate_visits": 0,
         }
 
-        while True:
-            result = await self.graph.ainvoke(state)
-            state.update(result)
-            classification = state.get("classification", "unknown")
-            logger.info("Classification: %s", classification)
-
-            current_url = state.get("url")
-            if current_url and current_url not in state["visited_urls"]:
-                state["visited_urls"].append(current_url)
-
-            if classification in ("intermediate", "simulate_fill") and state.get("html"):
-                continue
-            if classification == "form":
-                save_json_atomic(state.get("runtime", {}), Path("data") / "runtime_snapshot.json")
-                return state
-            # If we have a found_loan_application action, stop processing
-            if any(action.get("type") == "found_loan_application" for action in state.get("_new_actions", [])):
+        try:
+            while True:
+                result = await self.graph.ainvoke(state)
+                state.update(result)
+                classification = state.get("classification", "unknown")
+                logger.info("Classification: %s", classification)
+
+                current_url = state.get("url")
+                if current_url and current_url not in state.get("visited_urls_set", set()):
+                    # Rebound rather than extended: the result may share these with the graph
+                    state["visited_urls"] = state.get("visited_urls", []) + [current_url]
+                    state["visited_urls_set"] = state.get("visited_urls_set", set()) | {current_url}
+
+                if classification in ("intermediate", "simulate_fill") and self._page_html(state):
+                    continue
+                if classification == "form":
+                    await save_json_atomic_async(state.get("runtime", {}), self._snapshot_path("runtime_snapshot"))
+                    return state
+                # If we have a found_loan_application action, stop processing
+                if any(action.get("type") == "found_loan_application" for action in state.get("_new_actions", [])):
+                    return state
                 return state
-            return state
+        finally:
+            # Page HTML is only needed while the graph runs
+            for visited in state.get("visited_urls", []):
+                self._html_by_url.pop(visited, None)
+                for pending in (self._pending_classify.pop(visited, None), self._pending_extract.pop(visited, None),
+                                self._pending_next.pop(visited, None)):
+                    if pending is not None:
+                        self._discard(pending)
+            # Sets are not JSON serializable; the lists remain for the saved metadata
+            state.pop("already_clicked_set", None)
+            state.pop("visited_urls_set", None)
 
     async def classify_page_node(self, state: GraphState) -> GraphState:
         print("[TRACE] Entering classify_page_node")
         snippet = state.get("snippet", "")
         url = state.get("url", "")
         logger.info("Classifying page: %s", url)
-        llm_result = await self.groq.classify_form_or_intermediate(snippet=snippet, url=url)
+        html = self._page_html(state)
+        # Extraction and the next-button lookup only depend on the page, so on
+        # likely form pages they run concurrently with classification
+        if _FORM_TAG_RE.search(html):
+            self._speculate_form(url, snippet, html)
+        pending = self._pending_classify.pop(url, None)
+        try:
+            if pending is not None:
+                llm_result = await pending
+            else:
+                llm_result = await self.groq.classify_form_or_intermediate(snippet=snippet, url=url, html=html)
+        except BaseException:
+            for speculative in (self._pending_extract.pop(url, None), self._pending_next.pop(url, None)):
+                if speculative is not None:
+                    self._discard(speculative)
+            raise
         page_type = llm_result.get("page_type")
         
         if page_type not in ["intermediate", "form"]:
             logger.warning(f"Unknown page type: {page_type}, defaulting to intermediate")
             page_type = "intermediate"
+
+        if page_type != "form":
+            for speculative in (self._pending_extract.pop(url, None), self._pending_next.pop(url, None)):
+                if speculative is not None:
+                    self._discard(speculative)
             
         return {
             "classification": page_type,
@@ -230,23 +488,15 @@ class AsyncLangGraphOrchestrator:
         nav_result = await self._try_selectors(state.get("url"), nav_buttons, state)
 
         if nav_result:
-            # Get what we need before cleaning up
             url = nav_result["url"]
-            html = nav_result["html"]
             selector = nav_result["selector"]
+            self._speculate_classification(url, nav_result["snippet"])
             
-            # Clean up browser if it exists
-            if "browser" in nav_result:
-                try:
-                    await nav_result["browser"].close()
-                except Exception:
-                    pass
-
             return {
                 "url": url,
-                "html": html,
-                "snippet": html_to_text(html)[:4000],
+                "snippet": nav_result["snippet"],
                 "_new_actions": [{"type": "found_loan_application", "selector_used": selector}],
+                **self._click_updates(state, nav_result),
             }
         else:
             logger.warning("Could not find loan application button in navigation")
@@ -304,22 +554,16 @@ class AsyncLangGraphOrchestrator:
 
         if nav_result:
             url = nav_result["url"]
-            html = nav_result["html"]
             selector = nav_result["selector"]
-
-            if "browser" in nav_result:
-                try:
-                    await nav_result["browser"].close()
-                except Exception:
-                    pass
+            self._speculate_classification(url, nav_result["snippet"])
 
             return {
                 "url": url,
-                "html": html,
-                "snippet": html_to_text(html)[:4000],
+                "snippet": nav_result["snippet"],
                 "_new_actions": [{"type": "intermediate_option_selected", "selector_used": selector}],
                 "intermediate_visits": intermediate_visits,
                 "current_url": url,  # persist new location
+                **self._click_updates(state, nav_result),
             }
         else:
             return {
@@ -330,46 +574,60 @@ class AsyncLangGraphOrchestrator:
 
     async def simulate_form_fill_node(self, state: GraphState) -> GraphState:
         print(f"[TRACE] Entering simulate_form_fill_node")
-        html = state.get("html", "")
+        html = self._page_html(state)
         snippet = state.get("snippet", "")
-        llm_resp = await self.groq.find_next_or_submit_button(html = html,snippet=snippet)
+        pending = self._pending_next.pop(state.get("url", ""), None)
+        if pending is not None:
+            llm_resp = await pending
+        else:
+            llm_resp = await self.groq.find_next_or_submit_button(html = html,snippet=snippet)
         next_selectors = llm_resp.get("next_selectors", [])
         nav_result = await self._try_selectors(state.get("url"), next_selectors, state)
 
         if nav_result:
-            # Get what we need before cleaning up
             url = nav_result["url"]
-            html = nav_result["html"]
             selector = nav_result["selector"]
             
-            # Clean up browser if it exists
-            if "browser" in nav_result:
-                try:
-                    await nav_result["browser"].close()
-                except Exception:
-                    pass
-
             return {
                 "url": url,
-                "html": html,
-                "snippet": html_to_text(html)[:4000],
+                "snippet": nav_result["snippet"],
                 "_new_actions": [{"type": "form_next_click", "selector_used": selector}],
+                **self._click_updates(state, nav_result),
             }
         else:
             return {
-                "html": state.get("html", ""),  # Keep existing HTML if navigation fails
                 "_new_actions": [{"type": "form_next_no_nav", "candidates": next_selectors}]
             }
 
     async def extract_form_fields_node(self, state: GraphState) -> GraphState:
         print(f"[TRACE] Entering Extract_form_fields_node")
         snippet = state.get("snippet", "")
-        llm_resp = await self.groq.extract_form_fields(snippet=snippet)
-        parsed_forms = extract_forms(state.get("html", ""))
-        forms = state.get("forms", []) + [{"form_llm": llm_resp, "parsed_forms": parsed_forms}]
-        save_form_fields_csv(forms, Path("data") / "form_fields.csv")
+        url = state.get("url", "")
+        html = self._page_html(state)
+        # A multi-step form needs the next button of this same page, so ask for
+        # it concurrently with extraction instead of after it. Both are usually
+        # already running, started by classify_page_node
+        self._speculate_form(url, snippet, html)
+        extraction = self._pending_extract.pop(url)
+        next_lookup = self._pending_next.pop(url)
+        try:
+            llm_resp = await extraction
+        except BaseException:
+            self._discard(next_lookup)
+            raise
+        if llm_resp.get("multi_step"):
+            self._pending_next[url] = next_lookup
+        else:
+            self._discard(next_lookup)
+        parsed_forms = extract_forms(html)
+        new_form = {"form_llm": llm_resp, "parsed_forms": parsed_forms}
+        # The first form of a run truncates the CSV unless a batch already has;
+        # later steps only append their own rows
+        save_form_fields_csv(
+            [new_form], self.out_dir / "form_fields.csv", append=self.append_form_csv or bool(state.get("forms"))
+        )
         return {
-            "forms": forms,
+            "forms": [new_form],  # merged into state["forms"] by operator.add
             "form_llm": llm_resp,
             "_new_actions": [{"type": "form_extracted", "multi_step": llm_resp.get("multi_step")}],
         }
@@ -377,17 +635,17 @@ class AsyncLangGraphOrchestrator:
     async def find_submit_or_next_button_node(self, state: GraphState):
         # Add safety checks for required state
         print(f"[TRACE] Entering find_submit_or_next_button_node")
-        snippet = state.get("snippet", "")
-        llm_resp = await self.groq.find_next_or_submit_button(snippet=snippet)
-        html = state.get("html")
+        html = self._page_html(state)
         snippet = state.get("snippet")
         
         if not html or not snippet:
             logger.warning("Missing required state keys (html or snippet) in find_submit_or_next_button_node")
             return state
         
-        # Now safely use the values we got
-        page_type, selectors = await self.groq.find_next_or_submit_button(html, snippet)
+        # Single LLM round trip, only once we know the state is usable
+        llm_resp = await self.groq.find_next_or_submit_button(html, snippet)
+        page_type = llm_resp.get("page_type")
+        selectors = llm_resp.get("next_selectors", [])
 
         if page_type == "submit":
             logger.info("Submit button found. Ending process without clicking.")
@@ -404,7 +662,7 @@ class AsyncLangGraphOrchestrator:
             nav_result = await self._try_selectors(state.get("url"), selectors, state)  # Changed from current_url to url
             if nav_result:
                 state["url"] = nav_result["url"]
-                state["html"] = nav_result["html"]
+                state["snippet"] = nav_result["snippet"]
                 state.setdefault("_new_actions", []).append({
                     "action": "next_clicked",
                     "selector": nav_result["selector"],
@@ -428,7 +686,7 @@ class AsyncLangGraphOrchestrator:
         print(f"[TRACE] Entering end_node")
         runtime = state.get("runtime", {})
         runtime.update({"final_url": state.get("url")})
-        save_json_atomic(runtime, Path("data") / "runtime_end_snapshot.json")
+        await save_json_atomic_async(runtime, self._snapshot_path("runtime_end_snapshot"))
         return {"runtime": runtime}
 
     async def _try_selectors(self, url: str, selectors: List[Dict[str, Any]], state: GraphState) -> Optional[Dict[str, Any]]:
@@ -436,200 +694,225 @@ class AsyncLangGraphOrchestrator:
         if not url or not selectors:
             return None
 
-        already_clicked = set(state.get("already_clicked", []))
-        visited_urls = set(state.get("visited_urls", []))
-        
+        already_clicked = self._state_set(state, "already_clicked")
+
         # Filter out already clicked selectors
         selectors = [s for s in selectors if s.get("selector") not in already_clicked]
         if not selectors:
             logger.info("All suggested selectors already clicked, skipping navigation.")
             return None
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=False)  # Show browser window
-            context = await browser.new_context(viewport={'width': 1920, 'height': 1080})
-            page = await context.new_page()
-            
+        try:
+            return await asyncio.wait_for(self._try_selectors_impl(url, selectors, state), timeout=self.selector_budget)
+        except asyncio.TimeoutError:
+            logger.warning(f"_try_selectors hit {self.selector_budget:g}s budget on {url}")
+            return None
+
+    async def _try_selectors_impl(self, url: str, selectors: List[Dict[str, Any]], state: GraphState) -> Optional[Dict[str, Any]]:
+        context = await self._acquire_context()
+        page = await context.new_page()
+        try:
+            return await self._click_through(page, url, selectors, state)
+        finally:
+            try:
+                await page.close()
+            except Exception:
+                pass
+            await self._release_context(context)
+
+    async def _probe(self, page: Page, sel: str):
+        """Wait for a single selector, bounded by the shared probe semaphore."""
+        async with self._probe_sem:
+            logger.info(f"Trying selector: {sel}")
+            return await page.wait_for_selector(sel, timeout=_PROBE_TIMEOUT_MS)
+
+    async def _validate_and_click(self, page: Page, element, sel: str, url: str, visited_urls: set) -> Optional[Dict[str, Any]]:
+        """
+        Click a resolved element if it is actionable and report the navigation it
+        causes; callers record it in state through _click_updates.
+        """
+        # Validate element state in a single round trip to the browser
+        info = await element.evaluate(_ELEMENT_STATE_JS)
+        is_visible = info["visible"]
+        is_enabled = info["enabled"]
+        bbox = info["bbox"] if is_visible else None
+
+        logger.info(f"Element state - Visible: {is_visible}, Enabled: {is_enabled}, Position: {bbox}")
+
+        if is_visible and is_enabled and bbox:
+            # Check if element might lead to an already visited URL
+            href = info["href"]
+            if href:
+                # Resolve relative URLs
+                full_href = urljoin(url, href)
+                if full_href in visited_urls:
+                    logger.info(f"Skipping selector '{sel}' - target URL already visited: {full_href}")
+                    return None
+
+            # Try clicking
+            logger.info(f"Attempting to click element with selector: {sel}")
+
+            # Store the current URL before clicking
+            pre_click_url = page.url
+
+            # Click and wait for any navigation
+            await element.click(timeout=5000)
             try:
-                # Ensure full screen mode
-                await page.set_viewport_size({'width': 1920, 'height': 1080})
-                await page.evaluate("document.documentElement.requestFullscreen()")
-                
-                logger.info(f"Loading URL: {url}")
-                try:
-                    # First attempt with networkidle
-                    await page.goto(url, wait_until="networkidle", timeout=60000)  # 60 second timeout
-                    logger.info("Page loaded successfully with networkidle")
-                except Exception as e:
-                    logger.warning(f"Network idle timeout, falling back to domcontentloaded: {str(e)}")
-                    # Fallback to domcontentloaded
-                    await page.goto(url, wait_until="domcontentloaded", timeout=60000)
-                    # Wait additional time for any dynamic content
-                    await asyncio.sleep(5)
-                    logger.info("Page loaded successfully with fallback method")
-            except Exception as e:
-                logger.error(f"Initial page load failed: {str(e)}")
-                await browser.close()
-                return None
-
-            # Get HTML content for LLM analysis
-            html = await page.content()
+                # Wait for any navigation to reach DOMContentLoaded
+                await page.wait_for_load_state("domcontentloaded", timeout=5000)
+            except Exception:
+                # If no navigation occurs, that's okay
+                pass
+
+            # Get the new URL after clicking
+            nav_url = page.url
+
+            # If URL changed, we've had a successful navigation
+            if nav_url != pre_click_url:
+                # Snippet comes straight from the browser's rendered text; the
+                # full markup is kept off GraphState for the nodes that parse it
+                snapshot = await page.evaluate(_PAGE_SNAPSHOT_JS)
+                snippet = snapshot["text"][:4000]
+                html = snapshot["html"]
+                self._html_by_url[nav_url] = html
+
+                logger.info(f"Successfully clicked element. New URL: {nav_url}")
+
+                return {
+                    "url": nav_url,
+                    "html": html,
+                    "snippet": snippet,
+                    "selector": sel,
+                    # Element state as validated before the click
+                    "visible": is_visible,
+                    "enabled": is_enabled,
+                    "bbox": bbox,
+                }
+            else:
+                logger.info(f"Click didn't result in navigation, trying next selector")
+        return None
+
+    async def _click_text_locator(self, page: Page, text: str, url: str, visited_urls: set, already_clicked: set) -> Optional[Dict[str, Any]]:
+        """Resolve a button/link by accessible name (or title/aria-label) with a single wait."""
+        selector = _text_selector(text)
+        if selector in already_clicked:
+            logger.info(f"Selector already clicked: {selector}")
+            return None
+
+        locator = (
+            page.get_by_role("button", name=text)
+            .or_(page.get_by_role("link", name=text))
+            .or_(page.locator(f'[title="{text}"], [aria-label="{text}"]'))
+        ).first
+        try:
+            await locator.wait_for(state="visible", timeout=_PROBE_TIMEOUT_MS)
+            element = await locator.element_handle()
+            return await self._validate_and_click(page, element, selector, url, visited_urls)
+        except Exception as e:
+            logger.info(f"Text locator did not resolve for '{text}': {str(e)}")
+            return None
+
+    async def _click_through(self, page: Page, url: str, selectors: List[Dict[str, Any]], state: GraphState) -> Optional[Dict[str, Any]]:
+        """Load url in page and click the first candidate that navigates somewhere new."""
+        already_clicked = self._state_set(state, "already_clicked")
+        visited_urls = self._state_set(state, "visited_urls")
+
+        try:
+            # Viewport comes from the pooled context (see _acquire_context)
+            logger.info(f"Loading URL: {url}")
+            # Tracker-heavy pages rarely reach networkidle, so wait for the DOM only
+            await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+            logger.info("Page loaded successfully")
+        except Exception as e:
+            logger.error(f"Initial page load failed: {str(e)}")
+            return None
+
+        # Strategies already probed during this call; candidates often overlap
+        seen_selectors: Set[str] = set()
+
+        # Candidates keep the LLM's order; ranking happens per candidate below,
+        # across the strategies generated for it
+        for s in selectors:
+            text = s.get("text", "") if isinstance(s, dict) else ""
+
+            # Fast path: one composite role/title/aria-label locator covers most
+            # buttons and links without enumerating selector variants
+            if text and _text_selector(text) not in seen_selectors:
+                seen_selectors.add(_text_selector(text))
+                nav_result = await self._click_text_locator(page, text, url, visited_urls, already_clicked)
+                if nav_result:
+                    return nav_result
+
+            # Fallback: generate multiple selector strategies for each element
+            element_selectors = []
+            base_sel = s.get("selector") if isinstance(s, dict) else s
+
+            # The candidate itself came from an LLM call, so only ask for more
+            # selectors when it arrived without one
+            if text and not base_sel:
+                llm_selectors = await self._get_llm_selectors(text)
+                element_selectors.extend(llm_selectors)
             
-            # Rank selectors using SelectorManager
-            ranked_selectors = self.selector_manager.rank_selectors(selectors)
+            # Original selector
+            if base_sel:
+                element_selectors.append({"selector": base_sel, "text": text})
             
-            for s in ranked_selectors:
-                # Generate multiple selector strategies for each element
-                element_selectors = []
-                text = s.get("text", "") if isinstance(s, dict) else ""
-                
-                # Get additional selectors from LLM if we have text
-                if text:
-                    llm_selectors = await self._get_llm_selectors(html, text)
-                    element_selectors.extend(llm_selectors)
-                
-                # Original selector
-                base_sel = s.get("selector") if isinstance(s, dict) else s
-                if base_sel:
-                    element_selectors.append({"selector": base_sel, "text": text})
-                
-                    # Text-based selectors with varying specificity
-                if text:
-                    # XPath text match with element type hints
-                    element_selectors.extend([
-                        {"selector": f'//button[contains(text(),"{text}")]', "text": text},
-                        {"selector": f'//a[contains(text(),"{text}")]', "text": text},
-                        {"selector": f'//input[@value="{text}"]', "text": text},
-                        {"selector": f'//*[text()="{text}"]', "text": text},
-                    ])
-                    
-                    # CSS selectors for common button/link patterns
-                    element_selectors.extend([
-                        {"selector": f'a:has-text("{text}")', "text": text},
-                        {"selector": f'button:has-text("{text}")', "text": text},
-                        {"selector": f'[role="button"]:has-text("{text}")', "text": text},
-                    ])
-                    
-                    # Additional text-matching selectors
-                    element_selectors.extend([
-                        {"selector": f'//*[contains(text(),"{text}")]', "text": text},
-                        {"selector": f'//*[normalize-space()="{text}"]', "text": text},
-                        {"selector": f'[title="{text}"]', "text": text},
-                    ])                # Add test-specific selectors
-                if isinstance(s, dict):
-                    for attr, value in s.items():
-                        if attr in ["data-testid", "data-test", "data-qa"]:
-                            element_selectors.append(
-                                {"selector": f'[{attr}="{value}"]', "text": text}
-                            )
-                
-                # Add accessibility selectors
-                if isinstance(s, dict):
-                    for attr in ["aria-label", "role", "title"]:
-                        if attr in s:
-                            element_selectors.append(
-                                {"selector": f'[{attr}="{s[attr]}"]', "text": text}
-                            )
-                            
-                # Add form-specific selectors
-                if isinstance(s, dict):
-                    for attr in ["name", "for", "placeholder"]:
-                        if attr in s:
-                            element_selectors.append(
-                                {"selector": f'[{attr}="{s[attr]}"]', "text": text}
-                            )
-                
-                # Add data attribute selectors
-                if isinstance(s, dict):
-                    for attr, value in s.items():
-                        if attr.startswith("data-"):
-                            element_selectors.append(
-                                {"selector": f'[{attr}="{value}"]', "text": text}
-                            )
-                
-                # Add compound selectors for better specificity
-                if text and isinstance(s, dict) and "role" in s:
-                    element_selectors.append({
-                        "selector": f'[role="{s["role"]}"][text()="{text}"]',
-                        "text": text
-                    })
-                
-                # Try each selector strategy in order of their quality
-                sorted_selectors = self.selector_manager.rank_selectors(element_selectors)
-                for sel_dict in sorted_selectors:
-                    sel = sel_dict["selector"]
-                    if sel in already_clicked:
-                        logger.info(f"Selector already clicked: {sel}")
-                        continue
-                        
-                    try:
-                        logger.info(f"Trying selector: {sel}")
-                        element = await page.wait_for_selector(sel, timeout=5000)
-                        
-                        if element:
-                            # Validate element state
-                            is_visible = await element.is_visible()
-                            is_enabled = await element.is_enabled()
-                            bbox = await element.bounding_box()
-                            
-                            logger.info(f"Element state - Visible: {is_visible}, Enabled: {is_enabled}, Position: {bbox}")
-                            
-                            if is_visible and is_enabled and bbox:
-                                # Check if element might lead to an already visited URL
-                                href = await element.get_attribute("href")
-                                if href:
-                                    # Resolve relative URLs
-                                    from urllib.parse import urljoin
-                                    full_href = urljoin(url, href)
-                                    if full_href in visited_urls:
-                                        logger.info(f"Skipping selector '{sel}' - target URL already visited: {full_href}")
-                                        continue
-                                
-                                # Try clicking
-                                logger.info(f"Attempting to click element with selector: {sel}")
-                                
-                                # Store the current URL before clicking
-                                pre_click_url = page.url
-                                
-                                # Click and wait for any navigation
-                                await element.click(timeout=5000)
-                                try:
-                                    # Wait for either a navigation or network idle
-                                    await page.wait_for_load_state("networkidle", timeout=5000)
-                                except Exception:
-                                    # If no navigation occurs, that's okay
-                                    pass
-                                
-                                # Get the new URL after clicking
-                                nav_url = page.url
-                                
-                                # If URL changed, we've had a successful navigation
-                                if nav_url != pre_click_url:
-                                    # Get the updated content
-                                    html = await page.content()
-                                    
-                                    state.setdefault("already_clicked", []).append(sel)
-                                    state.setdefault("visited_urls", []).append(nav_url)
-                                    
-                                    logger.info(f"Successfully clicked element. New URL: {nav_url}")
-                                    
-                            
-                                    state["current_url"] = nav_url
-                                    
-                                    return {
-                                        "url": nav_url,
-                                        "html": html,
-                                        "selector": sel,
-                                        "browser": browser,
-                                        "page": page
-                                    }
-                                else:
-                                    logger.info(f"Click didn't result in navigation, trying next selector")
-                                
-                    except Exception as e:
-                        logger.error(f"Error with selector '{sel}': {str(e)}")
-                        continue
-
-            await browser.close()
-            logger.info("No successful clicks, closing browser")
-        return None 
+            # Text-based selectors with varying specificity
+            if text:
+                element_selectors.extend(
+                    {"selector": tmpl.format(t=text), "text": text} for tmpl in _TEXT_SELECTOR_TEMPLATES
+                )
+
+            # Test-id, accessibility, form and data-* attribute selectors in one pass
+            if isinstance(s, dict):
+                for attr, value in s.items():
+                    if attr in _ATTR_SELECTOR_KEYS or attr.startswith("data-"):
+                        element_selectors.append(
+                            {"selector": f'[{attr}="{value}"]', "text": text}
+                        )
+            
+            # Add compound selectors for better specificity
+            if text and isinstance(s, dict) and "role" in s:
+                element_selectors.append({
+                    "selector": f'[role="{s["role"]}"][text()="{text}"]',
+                    "text": text
+                })
+            
+            # Probe every strategy concurrently on the loaded page and try the
+            # ones that resolve, best-ranked first among those ready together
+            sorted_selectors = self.selector_manager.rank_selectors(element_selectors)
+            candidates = []
+            for sel_dict in sorted_selectors:
+                sel = sel_dict["selector"]
+                if sel in already_clicked:
+                    logger.info(f"Selector already clicked: {sel}")
+                    continue
+                if sel in seen_selectors:
+                    continue
+                seen_selectors.add(sel)
+                candidates.append(sel)
+
+            probes = {asyncio.ensure_future(self._probe(page, sel)): sel for sel in candidates}
+            rank = {sel: i for i, sel in enumerate(candidates)}
+            pending = set(probes)
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for probe in sorted(done, key=lambda t: rank[probes[t]]):
+                        sel = probes[probe]
+                        try:
+                            element = probe.result()
+                            if element:
+                                nav_result = await self._validate_and_click(page, element, sel, url, visited_urls)
+                                if nav_result:
+                                    return nav_result
+                        except Exception as e:
+                            logger.error(f"Error with selector '{sel}': {str(e)}")
+                            continue
+            finally:
+                for probe in pending:
+                    probe.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        logger.info("No successful clicks, releasing browser context")
+        return None
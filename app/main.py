@@ -2,12 +2,14 @@
 Async main entry point for the LangGraph async flow.
 Usage:
     python -m app.main --url "https://example-loans.example/apply"
+    python -m app.main --urls-file sites.txt --concurrency 8
 """
 
 import argparse
 import asyncio
 import logging
 from pathlib import Path
+from typing import List
 
 from utils.logging_config import configure_logging
 from app.scraper import AppScraper
@@ -23,24 +25,44 @@ load_dotenv()
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Async LangGraph-powered loan form scraper")
-    parser.add_argument("--url", required=True, help="Starting URL of the site to scan")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--url", help="Starting URL of the site to scan")
+    source.add_argument("--urls-file", help="File with one starting URL per line (blank lines and # comments ignored)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Max sites scraped at once with --urls-file")
     parser.add_argument("--out", default="data", help="Output directory for JSON metadata")
     parser.add_argument("--human", action="store_true", help="Force human-in-the-loop prompts")
     return parser.parse_args()
 
 
+def load_urls(path: Path) -> List[str]:
+    lines = (line.strip() for line in path.read_text(encoding="utf-8").splitlines())
+    return [line for line in lines if line and not line.startswith("#")]
+
+
 async def main():
     args = parse_args()
     out_dir = Path(args.out)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    logger.info("Starting async scraper for %s", args.url)
     scraper = AppScraper(out_dir=out_dir, human_in_loop=args.human)
     try:
-        result = await scraper.run(args.url)
-        logger.info("Scrape completed. Metadata saved to %s", result.saved_path)
+        if args.urls_file:
+            urls = load_urls(Path(args.urls_file))
+            logger.info("Starting async scraper for %d sites (concurrency=%d)", len(urls), args.concurrency)
+            results = await scraper.run_many(urls, concurrency=args.concurrency)
+            for url, result in zip(urls, results):
+                if isinstance(result, BaseException):
+                    logger.error("Scrape failed for %s: %s", url, result)
+                else:
+                    logger.info("Scrape completed for %s. Metadata saved to %s", url, result.saved_path)
+        else:
+            logger.info("Starting async scraper for %s", args.url)
+            result = await scraper.run(args.url)
+            logger.info("Scrape completed. Metadata saved to %s", result.saved_path)
     except Exception as e:
         logger.exception("Fatal error during scraping: %s", e)
+    finally:
+        await scraper.aclose()
 
 
 if __name__ == "__main__":
@@ -2,20 +2,35 @@
 Async AppScraper that fetches initial page with Playwright async API and invokes the async LangGraph orchestrator.
 """
 
+import asyncio
 import logging
+import re
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Union
 
-from playwright.async_api import async_playwright
+import httpx
+from playwright.async_api import Browser, TimeoutError as PlaywrightTimeoutError
 
-from agents.orchestrator import AsyncLangGraphOrchestrator
+from agents.orchestrator import AsyncLangGraphOrchestrator, BLOCKED_RESOURCE_TYPES, save_form_fields_csv
 from llm.groq_client import GroqClientAsync
-from utils.io import save_json_atomic
+from utils.io import save_json_atomic_async
 from utils.parser import html_to_text
 
 logger = logging.getLogger(__name__)
 
+# URL characters that are unsafe in file names, mapped to "_" in a single pass
+_FILENAME_TABLE = str.maketrans({":": "_", "/": "_", "?": "_", "&": "_", "=": "_"})
+_UNDERSCORE_RUN = re.compile(r"_+")
+
+# Signs that the served HTML is an app shell that only renders in a browser
+_JS_SHELL_MARKERS = ("window.__NEXT_DATA__", '<div id="root"></div>', '<div id="app"></div>', "data-reactroot")
+_MIN_STATIC_HTML = 20_000
+
+
+def _needs_js(html: str) -> bool:
+    return len(html) < _MIN_STATIC_HTML or any(marker in html for marker in _JS_SHELL_MARKERS)
+
 
 @dataclass
 class ScrapeResult:
@@ -25,48 +40,122 @@ class ScrapeResult:
 
 
 class AppScraper:
-    def __init__(self, out_dir: Path = Path("data"), human_in_loop: bool = False):
+    def __init__(self, out_dir: Path = Path("data"), human_in_loop: bool = False, static_fast_path: bool = True):
         self.out_dir = out_dir
         self.human_in_loop = human_in_loop
         self.groq = GroqClientAsync()
-        self.orchestrator = AsyncLangGraphOrchestrator(self.groq, human_in_loop=self.human_in_loop)
+        self.orchestrator = AsyncLangGraphOrchestrator(self.groq, human_in_loop=self.human_in_loop, out_dir=out_dir)
+        # Plain HTTP client for the static fast path; kept separate from the
+        # Groq client so its auth headers are never sent to scraped sites
+        self.static_fast_path = static_fast_path
+        self._http = httpx.AsyncClient(timeout=15.0, follow_redirects=True)
+
+    async def _ensure_browser(self) -> Browser:
+        """
+        Return the persistent Chromium instance, launching it on first use.
+        Shared with the orchestrator so a scrape runs on a single browser process.
+        """
+        return await self.orchestrator._ensure_browser()
 
     async def _open_page(self, url: str) -> Dict[str, Any]:
         """
         Open page with Playwright async API and return HTML & URL.
+        Each URL gets its own BrowserContext; only the context is closed afterwards.
+        Only the HTML is read here, so stylesheets are skipped along with media.
         """
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context()
+        context = await self.orchestrator._new_context(BLOCKED_RESOURCE_TYPES | {"stylesheet"})
+        try:
             page = await context.new_page()
-            resp = await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+            # Return as soon as the response starts, then give the DOM a bounded
+            # window; slow trackers delaying DOMContentLoaded don't block the scrape
+            try:
+                resp = await page.goto(url, wait_until="commit", timeout=15000)
+            except PlaywrightTimeoutError:
+                resp = None
+            try:
+                await page.wait_for_load_state("domcontentloaded", timeout=5000)
+            except PlaywrightTimeoutError:
+                logger.info("DOMContentLoaded not reached within 5s for %s, reading content anyway", url)
             status = resp.status if resp else None
             html = await page.content()
             current_url = page.url
-            await browser.close()
             return {"html": html, "status": status, "url": current_url}
+        finally:
+            await context.close()
 
-    async def run(self, url: str) -> ScrapeResult:
+    async def _fetch_static(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch server-rendered HTML over plain HTTP. Returns None when the page
+        looks JS-rendered or the request fails, so the caller uses Playwright.
+        """
+        try:
+            resp = await self._http.get(url)
+        except httpx.HTTPError as e:
+            logger.info("Static fetch failed for %s, using browser: %s", url, e)
+            return None
+        if resp.status_code >= 400 or "html" not in resp.headers.get("content-type", ""):
+            return None
+        html = resp.text
+        if _needs_js(html):
+            return None
+        return {"html": html, "status": resp.status_code, "url": str(resp.url)}
+
+    async def _fetch_page(self, url: str) -> Dict[str, Any]:
+        """
+        Initial page load: static HTTP fetch when possible, Playwright otherwise.
+        """
+        if self.static_fast_path:
+            payload = await self._fetch_static(url)
+            if payload is not None:
+                logger.info("Fetched %s without a browser", url)
+                return payload
+        return await self._open_page(url)
+
+    async def aclose(self) -> None:
+        """
+        Shut down the shared browser, Playwright driver and HTTP clients.
+        """
+        try:
+            await self.orchestrator.aclose()
+        finally:
+            await self.groq.aclose()
+            await self._http.aclose()
+
+    async def run(self, url: str, orchestrator: Optional[AsyncLangGraphOrchestrator] = None) -> ScrapeResult:
         # open initial page
-        page_payload = await self._open_page(url)
+        page_payload = await self._fetch_page(url)
         html = page_payload["html"]
         page_url = page_payload["url"]
 
-        snippet = html_to_text(html)[:4000]
+        snippet = html_to_text(html, limit=4000)
 
         # invoke async LangGraph orchestrator
-        metadata = await self.orchestrator.invoke_start(url=page_url, html=html, snippet=snippet)
+        orchestrator = orchestrator or self.orchestrator
+        metadata = await orchestrator.invoke_start(url=page_url, html=html, snippet=snippet)
 
         filename = f"{self.out_dir}/{self._sanitize_filename(page_url)}.json"
-        save_json_atomic(metadata, filename)
+        await save_json_atomic_async(metadata, filename)
         return ScrapeResult(site=page_url, metadata=metadata, saved_path=filename)
 
+    async def run_many(self, urls: List[str], concurrency: int = 8) -> List[Union[ScrapeResult, BaseException]]:
+        """
+        Scrape several sites concurrently on the shared browser, at most `concurrency` at a time.
+        Results are returned in input order; a failed site yields its exception instead of a ScrapeResult.
+        """
+        sem = asyncio.Semaphore(concurrency)
+        # Every run appends its forms to one CSV, started afresh for the batch
+        save_form_fields_csv([], self.out_dir / "form_fields.csv")
+
+        async def _one(u: str) -> ScrapeResult:
+            async with sem:
+                # Per-URL state (page HTML, speculative calls) and snapshots stay
+                # separate per run; browser and LLM cache are shared
+                orchestrator = self.orchestrator.spawn(run_name=self._sanitize_filename(u), append_form_csv=True)
+                return await self.run(u, orchestrator)
+
+        return await asyncio.gather(*[_one(u) for u in urls], return_exceptions=True)
+
     @staticmethod
     def _sanitize_filename(url: str) -> str:
-        return (
-            url.replace("://", "_")
-            .replace("/", "_")
-            .replace("?", "_")
-            .replace("&", "_")
-            .replace("=", "_")
-        )
+        # Collapsing runs keeps "https://x/a" -> "https_x_a", as with the old "://" replacement
+        return _UNDERSCORE_RUN.sub("_", url.translate(_FILENAME_TABLE))
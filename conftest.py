@@ -2,5 +2,31 @@
 import os
 import sys
 
+import pytest_asyncio
+from dotenv import load_dotenv
+from playwright.async_api import async_playwright
+
 # Add project root to Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__))))
+
+# Live-LLM tests read GROQ_API_KEY from .env; load it once per session here
+# since llm.groq_client no longer does it at import time
+load_dotenv()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def browser():
+    """One Playwright driver and headless Chromium shared by every browser test"""
+    p = await async_playwright().start()
+    b = await p.chromium.launch(headless=True)
+    yield b
+    await b.close()
+    await p.stop()
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def context(browser):
+    """Fresh context on the shared browser, closed after the test"""
+    ctx = await browser.new_context(viewport={'width': 1920, 'height': 1080})
+    yield ctx
+    await ctx.close()
@@ -10,28 +10,148 @@ which we attempt to parse safely.
 """
 
 import os
+import re
+import importlib.util
+import random
+import copy
+import functools
+import hashlib
 import logging
 import asyncio
 import httpx
-from typing import Dict, Any
-from dotenv import load_dotenv
-import json
-from bs4 import BeautifulSoup
-import time
-
-# Load env vars from .env before we read them
-load_dotenv()
+from typing import Dict, Any, Optional
+import orjson
+from selectolax.lexbor import LexborHTMLParser
 
+from utils.llm_cache import JSONCache
 from .prompts import (
-    PROMPT_EXTRACT_FORM,
-    PROMPT_FIND_LOAN_NAV,
-    PROMPT_CLASSIFY_FORM_OR_INTERMEDIATE,
-    PROMPT_ANALYZE_INTERMEDIATE_OPTIONS
+    render_extract_form,
+    render_find_loan_nav,
+    render_classify_form_or_intermediate,
+    render_analyze_intermediate_options,
+    render_next_or_submit,
 )
 
 
 logger = logging.getLogger(__name__)
 
+# Transient Groq responses worth retrying (rate limit, gateway errors)
+_RETRY_STATUSES = {429, 502, 503, 504}
+_MAX_ATTEMPTS = 4
+_MAX_BACKOFF = 30.0
+
+# HTTP/2 multiplexes concurrent completions over one connection; it needs the
+# optional h2 package (httpx[http2]), so fall back to HTTP/1.1 pooling without it
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+# Markdown code fence around a JSON answer, e.g. ```json {...} ```
+_FENCE_RE = re.compile(r"```(?:json)?\s*([\s\S]*?)\s*```", re.IGNORECASE)
+
+# Tags whose presence varies per page view (analytics, inline styles) rather than per template
+_SKELETON_SKIP = {"script", "style", "noscript", "template"}
+_SKELETON_FIELDS = {"input", "select", "textarea", "button"}
+
+
+class _JSONScanner:
+    """
+    Incremental, single-pass scanner for JSON blocks embedded in text. feed()
+    takes the next chunk and yields each top-level block, opened by one of
+    `openers`, as soon as its closing bracket arrives. Brace depth and
+    string/escape state carry across chunks, so brackets inside JSON strings
+    are ignored even when a chunk boundary splits them.
+    """
+
+    _PAIRS = {"{": "}", "[": "]"}
+
+    def __init__(self, openers: str = "{"):
+        self._openers = openers
+        self._closers = "".join(self._PAIRS[o] for o in openers)
+        self._buf = []  # earlier chunks of the block still open
+        self._depth = 0
+        self._in_str = False
+        self._escape = False
+
+    def feed(self, chunk: str):
+        start = 0
+        for i, ch in enumerate(chunk):
+            if self._in_str:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_str = False
+            elif ch in self._openers:
+                if self._depth == 0:
+                    start = i
+                self._depth += 1
+            elif self._depth:
+                if ch == '"':
+                    self._in_str = True
+                elif ch in self._closers:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        yield "".join(self._buf) + chunk[start:i + 1]
+                        self._buf = []
+        if self._depth:
+            self._buf.append(chunk[start:])
+
+
+def _iter_json_objects(text: str):
+    """Yield each top-level {...} block in `text` in a single linear pass."""
+    return _JSONScanner("{").feed(text)
+
+
+@functools.lru_cache(maxsize=8)
+def _tree(html: str) -> LexborHTMLParser:
+    """
+    Parse `html` once for all the structural helpers below; the same page is
+    fingerprinted and then reduced to its form markup. Callers must treat the
+    returned tree as read-only since it is shared.
+    """
+    return LexborHTMLParser(html)
+
+
+_FORM_STRUCTURE_CSS = "form, input, select, textarea, button, label, a"
+
+
+def _form_structural_snippet(html: str, limit: int = 2000) -> str:
+    """
+    Markup of just the form-relevant elements (forms, controls, labels, links),
+    each clipped to 300 chars. Much smaller than the page text yet keeps the
+    names/types the classification and extraction prompts actually use.
+    """
+    parts = []
+    covered = set()
+    for node in _tree(html).css(_FORM_STRUCTURE_CSS):
+        if node.mem_id in covered:
+            continue
+        markup = node.html or ""
+        if len(markup) <= 300:
+            # Emitted whole, so its nested controls need not be repeated
+            covered.update(d.mem_id for d in node.css(_FORM_STRUCTURE_CSS))
+        parts.append(markup[:300])
+    return "\n".join(parts)[:limit]
+
+
+def _structural_key(html: str) -> str:
+    """
+    Hash of the page's tag skeleton: tag names in DOM order, plus type/name for
+    form controls, with all text and other attributes dropped. Pages rendered
+    from the same template (different branding or copy) share a key.
+    """
+    parts = []
+    for node in _tree(html).root.traverse():
+        tag = node.tag
+        if tag in _SKELETON_SKIP:
+            continue
+        if tag in _SKELETON_FIELDS:
+            attrs = node.attributes
+            parts.append(f"{tag}[{attrs.get('type') or ''}|{attrs.get('name') or ''}]")
+        else:
+            parts.append(tag)
+    return hashlib.sha256(" ".join(parts).encode("utf-8")).hexdigest()
+
 
 class GroqClientAsync:
     def __init__(self, api_key: str = None, base_url: str = None, model: str = None):
@@ -44,162 +164,294 @@ class GroqClientAsync:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
+        # Completions at temperature 0 are deterministic, so identical requests
+        # are answered from disk. Set GROQ_CACHE_PATH="" to keep it in memory only.
+        self._cache = JSONCache(
+            os.getenv("GROQ_CACHE_PATH", os.path.join("data", "groq_cache.json")),
+            ttl=int(os.getenv("GROQ_CACHE_TTL", "604800")),
+        )
+        self.stats = {"hits": 0, "misses": 0}
+        # One pooled client for the lifetime of this wrapper so keep-alive
+        # connections (and their TLS sessions) are reused across calls; share
+        # the wrapper itself between orchestrators rather than making new ones
+        self._http = httpx.AsyncClient(
+            timeout=60.0,
+            headers=self.headers,
+            http2=_HTTP2,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+        )
+        # Responses keyed by "<method>:<structural key>"; least-used templates are evicted first
+        self._template_cache: Dict[str, Dict[str, Any]] = {}
+        self.template_cache_size = int(os.getenv("GROQ_TEMPLATE_CACHE_SIZE", "256"))
 
-    async def find_next_or_submit_button(self, html: str, snippet: str):
+    async def find_next_or_submit_button(self, html: str, snippet: str) -> Dict[str, Any]:
         """
-        Ask Groq to classify the main action button as either 'next' or 'submit'
-        and return JSON with the type and selectors.
-        """
-        prompt = f"""
-        You are an expert at analyzing HTML pages. 
-        Given this HTML and snippet, determine if the main action button is a 'next' button or a 'submit' button.
-
-        Rules:
-        - If it proceeds to another step, call it "next".
-        - If it finalizes or submits the form, call it "submit".
-        - Output format: JSON with keys "page_type" and "selectors" (list of CSS selectors).
-        
-        HTML:
-        {html}
-
-        Snippet:
-        {snippet}
+        Classify the main action button as either 'next' or 'submit'.
+        Returns {"page_type", "next_selectors"} with selectors as {"selector", ...} dicts.
         """
+        async def compute():
+            prompt = render_next_or_submit(html=_form_structural_snippet(html), snippet=snippet)
+            resp = await self._call(prompt)
+            parsed = self._safe_parse_json(resp.get("text", ""))
+            result = {
+                "page_type": parsed.get("page_type", "none"),
+                "next_selectors": [
+                    {"selector": sel} if isinstance(sel, str) else sel
+                    for sel in parsed.get("selectors", [])
+                ],
+            }
+            if "raw_text" in parsed:
+                # Keep the unparsed text so neither cache layer stores the failure
+                result["raw_text"] = parsed["raw_text"]
+            return result
 
-        response = await self.client.chat.completions.create(
-            model="llama3-8b-8192",  # or whichever model you're using
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0,
-        )
+        return await self._template_cached("find_next_or_submit_button", html, snippet, compute)
 
-        import json
+    async def aclose(self) -> None:
+        """Write out pending cache entries and close the pooled HTTP client."""
         try:
-            raw = response.choices[0].message.content
-            parsed = json.loads(raw)
-
-            page_type = parsed.get("page_type", "none")
-            selectors = parsed.get("selectors", [])
-
-            # Adapt to simulate_form_fill_node expectations
-            return {
-                "page_type": page_type,
-                "next_selectors": selectors
-            }
+            await self._cache.aflush()
+        finally:
+            await self._http.aclose()
 
-        except Exception as e:
-            self.logger.error(f"Error parsing Groq response for next/submit: {e}")
-            return {
-                "page_type": "none",
-                "next_selectors": []
-            }
+    async def _call(self, prompt: str, max_tokens: int = 800, temperature: float = 0) -> Dict[str, Any]:
+        """Send a prompt to Groq using the chat completions endpoint."""
+        messages = [
+            {"role": "system", "content": "You are a precise JSON-producing assistant."},
+            {"role": "user", "content": prompt},
+        ]
+        return await self._complete(messages, max_tokens=max_tokens, temperature=temperature)
 
+    async def raw_completion(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run a chat completion for caller-built messages and return the raw
+        response body (the "choices" structure), or {} if the call failed.
+        """
+        resp = await self._complete(
+            payload["messages"],
+            max_tokens=payload.get("max_tokens", 800),
+            temperature=payload.get("temperature", 0),
+        )
+        return resp.get("raw", {})
+
+    def _cache_key(self, messages: list, max_tokens: int) -> str:
+        blob = orjson.dumps(messages, option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(f"{self.model}|{max_tokens}|".encode("utf-8") + blob).hexdigest()
+
+    async def _complete(self, messages: list, max_tokens: int = 800, temperature: float = 0) -> Dict[str, Any]:
+        # Sampling at temperature > 0 is not reproducible, so never serve it from cache
+        key = self._cache_key(messages, max_tokens) if temperature == 0 else None
+        if key:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self.stats["hits"] += 1
+                return cached
+            self.stats["misses"] += 1
 
-    async def _call(self, prompt: str, max_tokens: int = 800) -> Dict[str, Any]:
-        """Send a prompt to Groq using the chat completions endpoint."""
         payload = {
             "model": self.model,
-            "messages": [
-                {"role": "system", "content": "You are a precise JSON-producing assistant."},
-                {"role": "user", "content": prompt},
-            ],
+            "messages": messages,
             "max_tokens": max_tokens,
-            "temperature": 0,
+            "temperature": temperature,
+            "stream": True,
         }
 
         endpoint = f"{self.base_url}/chat/completions"
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
+        try:
+            resp = await self._post_with_retry(endpoint, orjson.dumps(payload))
             try:
-                resp = await client.post(endpoint, headers=self.headers, json=payload)
                 resp.raise_for_status()
-                data = resp.json()
-                result_text = (
-                    data.get("choices", [{}])[0]
-                    .get("message", {})
-                    .get("content", "")
-                )
-
-                # 🔍 Print the raw response for debugging
-                print("\n================ RAW LLM RESPONSE ================\n")
-                print(result_text)
-                print("\n===================================================\n")
-
-                return {"raw": data, "text": result_text}
-            except Exception as e:
-                logger.exception("Groq API call failed: %s", e)
-                return {"error": str(e), "text": ""}
-            
-
-
-    async def extract_form_fields(self, snippet: str) -> Dict[str, Any]:
-        """Extract form fields and their properties from a form page."""
-        prompt = PROMPT_EXTRACT_FORM.format(snippet=snippet)
-        resp = await self._call(prompt)
-        return self._safe_parse_json(resp.get("text", ""))
+                if resp.headers.get("content-type", "").startswith("text/event-stream"):
+                    result_text = await self._read_stream(resp)
+                    # Same shape as a non-streamed body, for raw_completion callers
+                    data = {"choices": [{"message": {"role": "assistant", "content": result_text}}]}
+                else:
+                    data = orjson.loads(await resp.aread())
+                    result_text = (
+                        data.get("choices", [{}])[0]
+                        .get("message", {})
+                        .get("content", "")
+                    )
+            finally:
+                await resp.aclose()
+
+            # 🔍 Raw response for debugging; no stdout writes on the hot path
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Raw LLM response (len=%d):\n%s", len(result_text), result_text)
+
+            result = {"raw": data, "text": result_text}
+            if key and result_text:
+                await self._cache.aset(key, result)
+            return result
+        except Exception as e:
+            logger.exception("Groq API call failed: %s", e)
+            return {"error": str(e), "text": ""}
+
+    @staticmethod
+    async def _read_stream(resp: httpx.Response) -> str:
+        """
+        Accumulate the delta text of an SSE completion, returning as soon as
+        the first top-level JSON object in it is complete and parses; closing
+        the response then drops the rest of the stream. Only objects count, as
+        every prompt asks for one: a bracketed aside such as "[1]" before it must
+        not end the read early.
+        """
+        parts = []
+        scanner = _JSONScanner("{")
+        async for line in resp.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            choices = orjson.loads(data).get("choices") or [{}]
+            piece = (choices[0].get("delta") or {}).get("content") or ""
+            if not piece:
+                continue
+            parts.append(piece)
+            for block in scanner.feed(piece):
+                try:
+                    orjson.loads(block)
+                except orjson.JSONDecodeError:
+                    continue
+                return "".join(parts)
+        return "".join(parts)
+
+    async def _post_with_retry(self, endpoint: str, body: bytes) -> httpx.Response:
+        """
+        POST with up to _MAX_ATTEMPTS tries on 429/5xx gateway errors and network
+        failures, sleeping for Retry-After when given, else jittered backoff.
+        The last response (or error) is returned/raised to the caller; its body
+        is not read yet, so the caller must close it.
+        """
+        for attempt in range(1, _MAX_ATTEMPTS + 1):
+            try:
+                request = self._http.build_request("POST", endpoint, content=body)
+                resp = await self._http.send(request, stream=True)
+            except httpx.TransportError as e:
+                if attempt == _MAX_ATTEMPTS:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning("Groq request failed (%s), retrying in %.1fs", e, delay)
+            else:
+                if resp.status_code not in _RETRY_STATUSES or attempt == _MAX_ATTEMPTS:
+                    return resp
+                await resp.aclose()
+                delay = self._retry_after(resp)
+                if delay is None:
+                    delay = self._backoff(attempt)
+                logger.warning("Groq returned %d, retrying in %.1fs", resp.status_code, delay)
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        return min(_MAX_BACKOFF, 2 ** (attempt - 1)) + random.uniform(0, 1)
+
+    @staticmethod
+    def _retry_after(resp: httpx.Response) -> Optional[float]:
+        # Groq sends Retry-After in seconds; HTTP-date values fall back to backoff
+        try:
+            return min(_MAX_BACKOFF, float(resp.headers["retry-after"]))
+        except (KeyError, ValueError):
+            return None
+
+    async def _template_cached(self, method: str, html: str, snippet: str, compute, url: str = "") -> Dict[str, Any]:
+        """
+        Serve `method` from the template cache when a page with the same tag
+        skeleton, form markup (labels and option text included), snippet and
+        url was already answered; otherwise run `compute` and remember it.
+        Sites sharing a template but not their copy or options get their own
+        answers. Hits are deep copies, so callers may mutate what they get.
+        """
+        if not html:
+            return await compute()
+        content = "\x00".join((_form_structural_snippet(html), snippet or "", url or ""))
+        content_key = hashlib.sha256(content.encode("utf-8", "surrogatepass")).hexdigest()
+        key = f"{method}:{_structural_key(html)}:{content_key}"
+        entry = self._template_cache.get(key)
+        if entry is not None:
+            entry["freq"] += 1
+            logger.debug("Template cache hit for %s (freq=%d, ref=%r)", method, entry["freq"], entry["reference_snippet"])
+            return copy.deepcopy(entry["response"])
+
+        response = await compute()
+        if response and "raw_text" not in response:
+            if len(self._template_cache) >= self.template_cache_size:
+                coldest = min(self._template_cache, key=lambda k: self._template_cache[k]["freq"])
+                del self._template_cache[coldest]
+            self._template_cache[key] = {"response": copy.deepcopy(response), "reference_snippet": snippet[:200], "freq": 1}
+        return response
+
+    async def extract_form_fields(self, snippet: str, html: str = "") -> Dict[str, Any]:
+        """
+        Extract form fields and their properties from a form page.
+        When the page HTML is given, the prompt carries only its form structure
+        and a repeat of the same page reuses one answer.
+        """
+        async def compute():
+            focused = _form_structural_snippet(html) if html else ""
+            prompt = render_extract_form(snippet=focused or snippet)
+            resp = await self._call(prompt)
+            return self._safe_parse_json(resp.get("text", ""))
+
+        return await self._template_cached("extract_form_fields", html, snippet, compute)
 
     async def find_loan_application_nav(self, snippet: str) -> Dict[str, Any]:
         """
         Find navigation elements that lead to loan application pages.
         Returns a list of potential buttons/links with their selectors.
         """
-        prompt = PROMPT_FIND_LOAN_NAV.format(snippet=snippet)
+        prompt = render_find_loan_nav(snippet=snippet)
         resp = await self._call(prompt)
         return self._safe_parse_json(resp.get("text", ""))
 
-    async def classify_form_or_intermediate(self, snippet: str, url: str = "") -> Dict[str, Any]:
+    async def classify_form_or_intermediate(self, snippet: str, url: str = "", html: str = "") -> Dict[str, Any]:
         """
         Classify a page as either a form page or an intermediate selection page.
+        When the page HTML is given, the prompt carries only its form structure
+        and a repeat of the same page reuses one answer.
         """
-        prompt = PROMPT_CLASSIFY_FORM_OR_INTERMEDIATE.format(snippet=snippet, url=url)
-        resp = await self._call(prompt)
-        return self._safe_parse_json(resp.get("text", ""))
+        async def compute():
+            focused = _form_structural_snippet(html) if html else ""
+            prompt = render_classify_form_or_intermediate(snippet=focused or snippet, url=url)
+            resp = await self._call(prompt)
+            return self._safe_parse_json(resp.get("text", ""))
+
+        return await self._template_cached("classify_form_or_intermediate", html, snippet, compute, url=url)
 
     async def analyze_intermediate_options(self, snippet: str) -> Dict[str, Any]:
         """
         Analyze an intermediate page to extract all possible options a user might need to select from.
         Returns detailed information about each option to help with human decision making.
         """
-        prompt = PROMPT_ANALYZE_INTERMEDIATE_OPTIONS.format(snippet=snippet)
+        prompt = render_analyze_intermediate_options(snippet=snippet)
         resp = await self._call(prompt)
         return self._safe_parse_json(resp.get("text", ""))
 
     def _safe_parse_json(self, text: str) -> Dict[str, Any]:
         """Attempt to extract and parse JSON from possibly messy LLM output."""
-        import json
-        import re
-
-        # 📜 Always print what we received before parsing
-        print("\n🔍 Parsing LLM output:\n", text, "\n")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("🔍 Parsing LLM output (len=%d):\n%s", len(text or ""), text)
 
         if not text:
             logger.debug("LLM returned empty text for JSON parsing.")
             return {"raw_text": "", "confidence": 0.0}
 
         # Strip common markdown JSON fences
-        fenced = re.match(r"```(?:json)?\s*([\s\S]*?)\s*```", text.strip(), re.IGNORECASE)
+        fenced = _FENCE_RE.match(text.strip())
         if fenced:
             text = fenced.group(1).strip()
             logger.debug("🔍 Stripped markdown code fences. New text:\n%s", text)
 
-        # First attempt: naive bracket slice
-        try:
-            start = text.index("{")
-            end = text.rindex("}") + 1
-            candidate = text[start:end]
-            parsed = json.loads(candidate)
-            logger.debug("✅ Parsed JSON: %s", parsed)
-            return parsed
-        except Exception:
-            pass  # We'll try regex fallback next
-
-        # Fallback: scan for any {...} blocks
-        matches = re.findall(r"\{[\s\S]*\}", text)
-        for match in matches:
+        # Try each balanced top-level {...} block in order
+        loads = orjson.loads
+        for candidate in _iter_json_objects(text):
             try:
-                parsed = json.loads(match)
-                logger.debug("✅ Parsed JSON via fallback: %s", parsed)
+                parsed = loads(candidate)
+                logger.debug("✅ Parsed JSON: %s", parsed)
                 return parsed
-            except Exception:
+            except orjson.JSONDecodeError:
                 continue
 
         logger.debug("❌ No valid JSON found in text.")
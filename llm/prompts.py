@@ -1,5 +1,38 @@
 # llm/prompts.py
 
+from string import Formatter
+from typing import Any, Callable
+
+
+def compile_prompt(template: str) -> Callable[..., str]:
+    """
+    Pre-split a str.format template into literal chunks and fields so each
+    render is a plain join instead of re-parsing the template. Escaped {{ }}
+    come out as single braces, and values, conversions (!r) and format specs
+    (:>8) render exactly as with .format(). Only named fields are supported;
+    positional, attribute/index and nested-spec fields raise ValueError here.
+    """
+    formatter = Formatter()
+    pieces = []
+    for literal, field, spec, conversion in formatter.parse(template):
+        if field is not None and (not field.isidentifier() or "{" in spec):
+            raise ValueError(f"compile_prompt only supports plain named fields, got {{{field}}}")
+        pieces.append((literal, field, spec, conversion))
+
+    def render(**values: Any) -> str:
+        out = []
+        for literal, field, spec, conversion in pieces:
+            out.append(literal)
+            if field is None:
+                continue
+            value = values[field]
+            if conversion:
+                value = formatter.convert_field(value, conversion)
+            out.append(format(value, spec) if spec else str(value))
+        return "".join(out)
+
+    return render
+
 PROMPT_FIND_LOAN_NAV = """
 You are an expert at finding loan application links in website navigation.
 Given the page snippet, identify buttons/links that would lead to a loan application.
@@ -192,3 +225,69 @@ Return a JSON with a list of selectors:
 }}
 """
 
+PROMPT_NEXT_OR_SUBMIT = """
+You are an expert at analyzing loan application forms.
+Given the form markup and page snippet, decide whether the main action button
+proceeds to another step ("next") or finalizes the application ("submit").
+
+Form markup:
+{html}
+
+Page snippet:
+{snippet}
+
+Return JSON:
+{{
+  "page_type": "next" or "submit" or "none",
+  "selectors": [
+    {{"selector": "button.next-step", "type": "css", "text": "Next"}}
+  ],
+  "confidence": 0.0
+}}
+
+IMPORTANT:
+- "selectors" must point at the main action button, most specific first.
+- Use "none" when there is no next or submit button.
+ONLY output JSON.
+"""
+
+# Static half of the button-selector prompt; sent as the system message so it
+# is an identical prefix on every call. <TEXT> stands for the button text.
+PROMPT_GENERATE_SELECTORS_SYSTEM = """
+You generate effective CSS and XPath selectors to find a button element from its visible text.
+The selectors should be robust and consider different potential HTML structures.
+Consider using multiple approaches:
+1. Text-based selectors (exact and partial matches)
+2. Button/link specific selectors
+3. Role-based selectors
+4. Class/ID based selectors if consistent patterns are found
+5. Parent-child relationships if helpful
+
+Format your response as a JSON array of objects with 'selector' and 'type' fields. Example:
+[
+    {"selector": "//button[contains(text(), 'Apply Now')]", "type": "xpath"},
+    {"selector": "button:has-text('Apply Now')", "type": "css"}
+]
+
+Focus on these selector patterns:
+- XPath: exact text match: //button[text()='<TEXT>']
+- XPath: contains text: //button[contains(text(), '<TEXT>')]
+- XPath: normalize-space: //button[normalize-space()='<TEXT>']
+- XPath: case-insensitive: //button[contains(translate(text(),'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'<lowercase TEXT>')]
+- CSS: Playwright specific: button:has-text('<TEXT>')
+- CSS: with role: [role='button']:has-text('<TEXT>')
+- Combined: Multiple attributes: //button[@type='submit'][contains(text(), '<TEXT>')]
+ONLY output the JSON array.
+"""
+
+PROMPT_GENERATE_SELECTORS_USER = """Button text: "{button_text}"
+Return a JSON array of {{"selector", "type"}} objects for this button."""
+
+
+# Renderers for the templates used on every LLM call
+render_find_loan_nav = compile_prompt(PROMPT_FIND_LOAN_NAV)
+render_classify_form_or_intermediate = compile_prompt(PROMPT_CLASSIFY_FORM_OR_INTERMEDIATE)
+render_analyze_intermediate_options = compile_prompt(PROMPT_ANALYZE_INTERMEDIATE_OPTIONS)
+render_extract_form = compile_prompt(PROMPT_EXTRACT_FORM)
+render_next_or_submit = compile_prompt(PROMPT_NEXT_OR_SUBMIT)
+render_generate_selectors_user = compile_prompt(PROMPT_GENERATE_SELECTORS_USER)
@@ -16,7 +16,7 @@ async def get_page_content(url: str) -> tuple[str, str]:
         page = await browser.new_page()
         await page.goto(url, wait_until="domcontentloaded")
         html = await page.content()
-        snippet = html_to_text(html)[:4000]
+        snippet = html_to_text(html, limit=4000)
         await browser.close()
         return html, snippet
 
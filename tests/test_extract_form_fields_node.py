@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 from agents.orchestrator import AsyncLangGraphOrchestrator
 from llm.groq_client import GroqClientAsync
@@ -118,3 +119,105 @@ async def test_form_field_validation():
     assert email_field.get("required") == True
     assert phone_field.get("required") == True
     assert "pattern" in phone_field
+
+@pytest.mark.asyncio
+async def test_extraction_overlaps_classification(monkeypatch, tmp_path):
+    """On a page with a <form>, extraction and the next lookup start while classification runs"""
+    monkeypatch.chdir(tmp_path)
+    started = {"extract": asyncio.Event(), "next": asyncio.Event()}
+
+    class FakeGroq:
+        async def classify_form_or_intermediate(self, snippet, url="", html=""):
+            # Only returns once both speculative calls are in flight
+            await asyncio.wait_for(asyncio.gather(*(e.wait() for e in started.values())), timeout=1)
+            return {"page_type": "form"}
+
+        async def extract_form_fields(self, snippet, html=""):
+            started["extract"].set()
+            return {"multi_step": False, "fields": [{"name": "business_name"}]}
+
+        async def find_next_or_submit_button(self, html, snippet):
+            started["next"].set()
+            return {"page_type": "submit", "next_selectors": []}
+
+    orchestrator = AsyncLangGraphOrchestrator(FakeGroq(), llm_cache_path=None)
+    state = {
+        "url": "https://example.com/apply",
+        "html": "<form><input name='business_name'></form>",
+        "snippet": "Loan application",
+    }
+
+    result = await orchestrator.classify_page_node(state)
+    assert result["classification"] == "form"
+
+    result = await orchestrator.extract_form_fields_node(state)
+    assert result["form_llm"]["fields"] == [{"name": "business_name"}]
+    assert not orchestrator._pending_extract and not orchestrator._pending_next
+
+class FormPageGroq:
+    """Groq stand-in for a landing page that already is the application form"""
+
+    async def find_loan_application_nav(self, snippet):
+        return {"loan_application_buttons": []}
+
+    async def classify_form_or_intermediate(self, snippet, url="", html=""):
+        return {"page_type": "form"}
+
+    async def extract_form_fields(self, snippet, html=""):
+        await asyncio.sleep(0.01)
+        return {"multi_step": False, "fields": [{"name": "business_name"}]}
+
+    async def find_next_or_submit_button(self, html, snippet):
+        return {"page_type": "submit", "next_selectors": []}
+
+
+@pytest.mark.asyncio
+async def test_graph_records_each_form_once(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    orchestrator = AsyncLangGraphOrchestrator(FormPageGroq(), llm_cache_path=None)
+    state = await orchestrator.invoke_start("https://example.com/apply", "<form><input name='business_name'></form>", "Loan application")
+    assert len(state["forms"]) == 1
+    assert [a["type"] for a in state["_new_actions"]].count("form_extracted") == 1
+
+
+@pytest.mark.asyncio
+async def test_clicks_are_recorded_once_through_node_updates(monkeypatch, tmp_path):
+    """A navigation made by landing_page_node lands in state via its update, not by mutation"""
+    monkeypatch.chdir(tmp_path)
+    orchestrator = AsyncLangGraphOrchestrator(FormPageGroq(), llm_cache_path=None)
+    start, form_url = "https://example.com/", "https://example.com/apply"
+
+    async def fake_try_selectors(url, selectors, state):
+        orchestrator._html_by_url[form_url] = "<form><input name='business_name'></form>"
+        return {"url": form_url, "snippet": "Application", "selector": "text=Apply"}
+
+    monkeypatch.setattr(orchestrator, "_try_selectors", fake_try_selectors)
+    state = await orchestrator.invoke_start(start, "<a href='/apply'>Apply</a>", "Home")
+
+    assert state["already_clicked"] == ["text=Apply"]
+    assert state["visited_urls"] == [start, form_url]
+    assert len(state["forms"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_spawned_runs_stay_isolated(monkeypatch, tmp_path):
+    """Concurrent runs of one URL on spawned orchestrators keep their own state and share the CSV"""
+    monkeypatch.chdir(tmp_path)
+    out_dir = tmp_path / "out"
+    parent = AsyncLangGraphOrchestrator(FormPageGroq(), llm_cache_path=None, out_dir=out_dir)
+    url = "https://example.com/apply"
+    html = "<form><input name='business_name'></form>"
+    runs = [parent.spawn(run_name=f"run{i}", append_form_csv=True) for i in range(2)]
+
+    states = await asyncio.gather(*(run.invoke_start(url, html, "Loan application") for run in runs))
+
+    assert [len(state["forms"]) for state in states] == [1, 1]
+    assert all(run.groq is parent.groq for run in runs)
+    assert all(run._ctx_pool is parent._ctx_pool and run._probe_sem is parent._probe_sem for run in runs)
+    assert not any(run._owns_browser for run in runs)
+    rows = (out_dir / "form_fields.csv").read_text().splitlines()
+    # One header, then a row from each run
+    assert len(rows) == 3 and rows[0] == "field_name,type,options"
+    assert (out_dir / "runtime_snapshot_run0.json").exists()
+    assert (out_dir / "runtime_snapshot_run1.json").exists()
+    assert not (tmp_path / "data").exists()
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+import pytest_asyncio
+
+from llm.groq_client import GroqClientAsync
+from llm.prompts import compile_prompt
+
+TEMPLATE = "<form><label>Amount</label><select name='amount'>{options}</select><button>Next</button></form>"
+
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    monkeypatch.setenv("GROQ_CACHE_PATH", "")
+    groq = GroqClientAsync(api_key="test-key")
+    yield groq
+    await groq.aclose()
+
+
+@pytest.mark.asyncio
+async def test_template_cache_keeps_sites_sharing_a_template_apart(client):
+    calls = []
+
+    def compute_for(options):
+        async def compute():
+            calls.append(options)
+            return {"fields": [{"name": "amount", "options": options}]}
+        return compute
+
+    html_a = TEMPLATE.format(options="<option>10k</option>")
+    html_b = TEMPLATE.format(options="<option>50k</option>")
+    first = await client._template_cached("extract_form_fields", html_a, "Lender A", compute_for(["10k"]))
+    other = await client._template_cached("extract_form_fields", html_b, "Lender B", compute_for(["50k"]))
+    assert other["fields"][0]["options"] == ["50k"]
+
+    # Same page again is served from the cache, as a copy callers may mutate
+    first["fields"].clear()
+    again = await client._template_cached("extract_form_fields", html_a, "Lender A", compute_for(["10k"]))
+    assert again["fields"][0]["options"] == ["10k"]
+    assert calls == [["10k"], ["50k"]]
+
+
+@pytest.mark.asyncio
+async def test_template_cache_key_includes_url(client):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return {"page_type": "form"}
+
+    html = TEMPLATE.format(options="")
+    await client._template_cached("classify_form_or_intermediate", html, "Apply", compute, url="https://a.test")
+    await client._template_cached("classify_form_or_intermediate", html, "Apply", compute, url="https://b.test")
+    assert len(calls) == 2
+
+
+def test_compiled_prompt_renders_like_str_format():
+    template = "a {x} {y!r:>6} {{z}}"
+    assert compile_prompt(template)(x=3, y="h") == template.format(x=3, y="h")
+
+
+@pytest.mark.parametrize("template", ["{}", "{0}", "{a.b}", "{a[0]}", "{a:{w}}"])
+def test_compile_prompt_rejects_fields_it_cannot_render(template):
+    with pytest.raises(ValueError):
+        compile_prompt(template)
+
+
+@pytest.mark.asyncio
+async def test_stream_is_not_cut_short_by_a_bracketed_preamble():
+    class FakeStream:
+        async def aiter_lines(self):
+            for piece in ("See [1] below: ", '{"page_type": ', '"form"}', " trailing"):
+                yield "data: " + json.dumps({"choices": [{"delta": {"content": piece}}]})
+            yield "data: [DONE]"
+
+    text = await GroqClientAsync._read_stream(FakeStream())
+    assert text == 'See [1] below: {"page_type": "form"}'
@@ -6,245 +6,274 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 import pytest
 from agents.orchestrator import AsyncLangGraphOrchestrator
 from llm.groq_client import GroqClientAsync
-from playwright.async_api import async_playwright
-from utils.parser import html_to_text
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 
 # Configure logging
 import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Rendered text straight from the page; avoids re-parsing the full HTML for 4 KB
+SNIPPET_JS = "() => (document.body ? document.body.innerText : '').slice(0, 4000)"
+
 @pytest.fixture
 async def orchestrator():
     groq = GroqClientAsync()
     return AsyncLangGraphOrchestrator(groq, human_in_loop=False)
 
-async def get_page_content(url: str) -> tuple[str, str]:
-    """Helper to get HTML and snippet from a URL"""
+async def get_page_content(browser, url: str) -> tuple[str, str]:
+    """Helper to get HTML and snippet from a URL, using a fresh context on the shared browser"""
     print(f"\n🌐 Opening URL: {url}")
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)
-        context = await browser.new_context(viewport={'width': 1920, 'height': 1080})
-        page = await context.new_page()
-        
+    context = await browser.new_context(viewport={'width': 1920, 'height': 1080})
+    page = await context.new_page()
+    
+    try:
+        # Viewport comes from new_context; fullscreen is meaningless without a user gesture
+        print("⏳ Loading page...")
+        # Many loan sites never go network-idle (analytics beacons), so load to
+        # DOMContentLoaded and give the load event a short settle window
+        await page.goto(url, wait_until="domcontentloaded", timeout=15000)
         try:
-            # Maximize the browser window
-            await page.set_viewport_size({'width': 1920, 'height': 1080})
-            await page.evaluate("document.documentElement.requestFullscreen()")
+            await page.wait_for_load_state("load", timeout=5000)
+        except Exception as e:
+            print(f"⚠️ Load event not reached, continuing with DOM content: {str(e)}")
+        print("✅ Page loaded successfully")
+        
+        # Debug: Get all visible buttons/links with enhanced detection
+        print("\n🔍 Scanning for clickable elements with enhanced detection...")
+        scan_js = """(() => {
+            const isElementInViewport = (el) => {
+                const rect = el.getBoundingClientRect();
+                return (
+                    rect.top >= 0 &&
+                    rect.left >= 0 &&
+                    rect.bottom <= (window.innerHeight || document.documentElement.clientHeight) &&
+                    rect.right <= (window.innerWidth || document.documentElement.clientWidth)
+                );
+            };
             
-            print("⏳ Loading page...")
-            # Wait for full network load and a bit extra for dynamic content
-            # First try to load with networkidle, fallback to domcontentloaded if timeout
-            try:
-                await page.goto(url, wait_until="networkidle", timeout=60000)  # 60 second timeout
-                print("✅ Page loaded successfully with networkidle")
-            except Exception as e:
-                print(f"⚠️ Network idle timeout, falling back to domcontentloaded: {str(e)}")
-                await page.goto(url, wait_until="domcontentloaded", timeout=60000)
-                # Wait additional time for any dynamic content
-                await asyncio.sleep(5)
-                print("✅ Page loaded successfully with fallback method")
+            const getElementText = (el) => {
+                // Try various ways to get text content
+                return (
+                    el.innerText || 
+                    el.textContent || 
+                    el.getAttribute('aria-label') || 
+                    el.getAttribute('title') || 
+                    el.getAttribute('alt') || 
+                    ''
+                ).toLowerCase().trim();
+            };
             
-            # Debug: Get all visible buttons/links with enhanced detection
-            print("\n🔍 Scanning for clickable elements with enhanced detection...")
-            buttons = await page.evaluate("""(() => {
-                const isElementInViewport = (el) => {
-                    const rect = el.getBoundingClientRect();
-                    return (
-                        rect.top >= 0 &&
-                        rect.left >= 0 &&
-                        rect.bottom <= (window.innerHeight || document.documentElement.clientHeight) &&
-                        rect.right <= (window.innerWidth || document.documentElement.clientWidth)
-                    );
-                };
+            const isClickable = (el) => {
+                try {
+                    const style = window.getComputedStyle(el);
+                    const isVisible = style.display !== 'none' && 
+                                    style.visibility !== 'hidden' && 
+                                    parseFloat(style.opacity) > 0;
+                    const hasSize = el.offsetWidth > 0 && el.offsetHeight > 0;
+                    const isInViewport = isElementInViewport(el);
+                    
+                    // Also check if it has any text content
+                    const hasContent = getElementText(el).length > 0 || el.getElementsByTagName('img').length > 0;
+                    
+                    return isVisible && hasSize && isInViewport && hasContent;
+                } catch (e) {
+                    return false;
+                }
+            };
+            
+            // Only interactive elements can be clicked, so skip style lookups on everything else
+            const candidates = 'a, button, [role="button"], [onclick], input[type="button"], input[type="submit"]';
+            
+            // Each term list compiled once into a single alternation; substring
+            // semantics (no word boundaries) match the old .includes() checks
+            const directApplyRe = /apply now|apply for a loan|get started|start application/;
+            const loanProgramRe = /loan programs|our loans|loan products|explore loans|business loans|lending solutions|financing options/;
+            const urlRe = new RegExp('/apply|/application|/loans|/get-started|/products|/loan-programs');
+            const genericRe = /apply|loan|funding|finance|lending/;
+            
+            // Metadata and selector options for one matched element
+            const describe = (el) => {
+                // Generate multiple selector options
+                const selectors = [];
                 
-                const getElementText = (el) => {
-                    // Try various ways to get text content
-                    return (
-                        el.innerText || 
-                        el.textContent || 
-                        el.getAttribute('aria-label') || 
-                        el.getAttribute('title') || 
-                        el.getAttribute('alt') || 
-                        ''
-                    ).toLowerCase().trim();
-                };
+                // Try ID
+                if (el.id) selectors.push({strategy: 'css', value: '#' + el.id});
                 
-                const isClickable = (el) => {
-                    try {
-                        const style = window.getComputedStyle(el);
-                        const isInteractive = el.tagName === 'A' || el.tagName === 'BUTTON' || 
-                                            el.getAttribute('role') === 'button' ||
-                                            el.onclick != null;
-                        const isVisible = style.display !== 'none' && 
-                                        style.visibility !== 'hidden' && 
-                                        parseFloat(style.opacity) > 0;
-                        const hasSize = el.offsetWidth > 0 && el.offsetHeight > 0;
-                        const isInViewport = isElementInViewport(el);
-                        
-                        // Also check if it has any text content
-                        const hasContent = getElementText(el).length > 0 || el.getElementsByTagName('img').length > 0;
-                        
-                        return isInteractive && isVisible && hasSize && isInViewport && hasContent;
-                    } catch (e) {
-                        return false;
+                // Try classes
+                if (el.className) {
+                    const classSelector = '.' + el.className.split(' ').join('.');
+                    selectors.push({strategy: 'css', value: classSelector});
+                }
+                
+                // Try data attributes (iterated in place, no array copy)
+                for (const attr of el.attributes) {
+                    if (attr.name.startsWith('data-')) {
+                        selectors.push({strategy: 'css', value: '[' + attr.name + '="' + attr.value + '"]'});
                     }
-                };
+                }
                 
-                return Array.from(document.querySelectorAll('*'))
-                    .filter(el => {
-                        // Safe text extraction with null check
-                        const text = (el.innerText || el.textContent || '').toLowerCase().trim();
-                        
-                        // Priority 1: Direct application buttons/links
-                        const directApplyTerms = ['apply now', 'apply for a loan', 'get started', 'start application'];
-                        const isDirectApply = directApplyTerms.some(term => text.includes(term));
-                        if (isDirectApply && isClickable(el)) return true;
-                        
-                        // Priority 2: Loan program/product links
-                        const loanProgramTerms = ['loan programs', 'our loans', 'loan products', 'explore loans', 
-                                                'business loans', 'lending solutions', 'financing options'];
-                        const isLoanProgram = loanProgramTerms.some(term => text.includes(term));
-                        if (isLoanProgram && isClickable(el)) return true;
-                        
-                        // Priority 3: URL-based matching for links
-                        const href = (el.href || '').toLowerCase();
-                        const urlTerms = ['/apply', '/application', '/loans', '/get-started', '/products', '/loan-programs'];
-                        const hasRelevantUrl = urlTerms.some(term => href.includes(term));
-                        if (hasRelevantUrl && isClickable(el)) return true;
-                        
-                        // Priority 4: Generic loan-related terms as fallback
-                        const genericTerms = ['apply', 'loan', 'funding', 'finance', 'lending'];
-                        const isGenericLoan = genericTerms.some(term => text.includes(term));
-                        return isGenericLoan && isClickable(el);
-                    })
-                    .map(el => {
-                        // Generate multiple selector options
-                        const selectors = [];
-                        
-                        // Try ID
-                        if (el.id) selectors.push('#' + el.id);
-                        
-                        // Try classes
-                        if (el.className) {
-                            const classSelector = '.' + el.className.split(' ').join('.');
-                            selectors.push(classSelector);
-                        }
-                        
-                        // Try data attributes
-                        Array.from(el.attributes).forEach(attr => {
-                            if (attr.name.startsWith('data-')) {
-                                selectors.push('[' + attr.name + '="' + attr.value + '"]');
-                            }
-                        });
-                        
-                        // Try text content
-                        const text = el.innerText.trim();
-                        if (text) {
-                            selectors.push('//*[contains(text(),"' + text + '")]');
-                        }
-                        
-                        // Default to tag name if nothing else works
-                        selectors.push(el.tagName.toLowerCase());
-                        
-                        const rect = el.getBoundingClientRect();
-                        return {
-                            tag: el.tagName.toLowerCase(),
-                            text: text,
-                            href: el.href || '',
-                            classes: el.className,
-                            id: el.id,
-                            selectors: selectors,
-                            rect: {
-                                x: rect.x,
-                                y: rect.y,
-                                width: rect.width,
-                                height: rect.height
-                            },
-                            styles: {
-                                display: window.getComputedStyle(el).display,
-                                visibility: window.getComputedStyle(el).visibility,
-                                opacity: window.getComputedStyle(el).opacity,
-                                position: window.getComputedStyle(el).position,
-                                zIndex: window.getComputedStyle(el).zIndex
-                            }
-                        };
-                    });
-            })()""")
-            
-            print("\n🔘 Found clickable elements that might be loan-related:")
-            for btn in buttons:
-                print("\nPotential loan-related button:")
-                print(f"  Text: {btn['text']}")
-                print(f"  Tag: {btn['tag']}")
-                print(f"  Classes: {btn['classes']}")
-                print(f"  ID: {btn['id']}")
-                print(f"  Href: {btn.get('href', 'N/A')}")
-                print(f"  Position: {btn.get('rect', {})}")
-                print(f"  Styles: {btn.get('styles', {})}")
-                print("\nTrying multiple selector strategies:")
+                // Try text content (matched with get_by_text rather than a document-wide XPath)
+                const text = el.innerText.trim();
+                if (text) {
+                    selectors.push({strategy: 'text', value: text});
+                }
                 
-                for selector in btn['selectors']:
-                    try:
-                        print(f"\nTesting selector: {selector}")
-                        element = await page.wait_for_selector(selector, timeout=5000)
-                        if element:
-                            is_visible = await element.is_visible()
-                            is_enabled = await element.is_enabled()
-                            bbox = await element.bounding_box()
-                            print(f"  Visible: {is_visible}")
-                            print(f"  Enabled: {is_enabled}")
-                            print(f"  Position: {bbox}")
-                            
-                            if is_visible and is_enabled and bbox:
-                                print("  ✅ Found valid selector!")
-                                
-                                # Try clicking the element
-                                try:
-                                    print("  🖱️ Attempting to click...")
-                                    await element.click(timeout=5000)
-                                    await page.wait_for_load_state("networkidle")
-                                    new_url = page.url
-                                    print(f"  ✅ Click successful! New URL: {new_url}")
-                                    
-                                    # Return early with the successful click result
-                                    html = await page.content()
-                                    snippet = html_to_text(html)[:4000]
-                                    print(f"\n📄 Got page content from new page ({len(html)} bytes)")
-                                    await browser.close()
-                                    return html, snippet
-                                    
-                                except Exception as e:
-                                    print(f"  ❌ Click failed: {str(e)}")
-                                    
-                    except Exception as e:
-                        print(f"  ❌ Selector failed: {str(e)}")
+                // Default to tag name if nothing else works
+                selectors.push({strategy: 'css', value: el.tagName.toLowerCase()});
+                
+                const rect = el.getBoundingClientRect();
+                return {
+                    tag: el.tagName.toLowerCase(),
+                    text: text,
+                    href: el.href || '',
+                    classes: el.className,
+                    id: el.id,
+                    selectors: selectors,
+                    rect: {
+                        x: rect.x,
+                        y: rect.y,
+                        width: rect.width,
+                        height: rect.height
+                    }
+                };
+            };
             
-            # If we get here, no successful clicks were made
-            html = await page.content()
-            snippet = html_to_text(html)[:4000]
-            print(f"\n📄 Got page content ({len(html)} bytes)")
+            const fallback = [];
+            for (const el of document.querySelectorAll(candidates)) {
+                // Safe text extraction with null check
+                const text = (el.innerText || el.textContent || '').toLowerCase().trim();
+                const href = (el.href || '').toLowerCase();
+                
+                // Priority 1: Direct application buttons/links always win, so stop
+                // scanning and describe only this element
+                if (directApplyRe.test(text)) {
+                    if (isClickable(el)) return [describe(el)];
+                    continue;
+                }
+                
+                const isCandidate =
+                    loanProgramRe.test(text) ||  // Priority 2: Loan program/product links
+                    urlRe.test(href) ||          // Priority 3: URL-based matching for links
+                    genericRe.test(text);        // Priority 4: Generic loan-related terms as fallback
+                if (isCandidate && isClickable(el)) fallback.push(el);
+            }
+            return fallback.map(describe);
+        })()"""
+        buttons = await page.evaluate(scan_js)
+        if not buttons:
+            # Nothing rendered yet; only now pay for waiting on network idle
+            print("⚠️ No candidates yet, waiting for network idle and rescanning")
+            try:
+                await page.wait_for_load_state("networkidle", timeout=15000)
+            except Exception as e:
+                print(f"⚠️ Network idle timeout: {str(e)}")
+            buttons = await page.evaluate(scan_js)
+        
+        print("\n🔘 Found clickable elements that might be loan-related:")
+        for btn in buttons:
+            print("\nPotential loan-related button:")
+            print(f"  Text: {btn['text']}")
+            print(f"  Tag: {btn['tag']}")
+            print(f"  Classes: {btn['classes']}")
+            print(f"  ID: {btn['id']}")
+            print(f"  Href: {btn.get('href', 'N/A')}")
+            print(f"  Position: {btn.get('rect', {})}")
+        
+        # Resolve every candidate selector in a single evaluate instead of a
+        # wait_for_selector round-trip each; matches come back in button order.
+        # The validated element is tagged so the click below lands on exactly
+        # it, not on some other element elsewhere with the same text
+        matches = await page.evaluate("""(buttons) => {
+            const clickable = 'a, button, [role="button"], [onclick], input[type="button"], input[type="submit"]';
+            const resolve = (selector) => {
+                try {
+                    if (selector.strategy === 'text') {
+                        return Array.from(document.querySelectorAll(clickable))
+                            .find(el => (el.innerText || '').includes(selector.value));
+                    }
+                    return document.querySelector(selector.value);
+                } catch (e) {
+                    return null;
+                }
+            };
+            const matches = [];
+            buttons.forEach((btn, btnIndex) => {
+                let target = null;
+                const selector = btn.selectors.find(sel => {
+                    const el = resolve(sel);
+                    if (el && el.offsetWidth > 0 && !el.disabled) target = el;
+                    return target !== null;
+                });
+                if (selector) {
+                    target.setAttribute('data-loan-candidate', String(btnIndex));
+                    matches.push({btnIndex, selector});
+                }
+            });
+            return matches;
+        }""", buttons)
+        
+        for match in matches:
+            selector = match['selector']
+            print(f"\n✅ Found valid {selector['strategy']} selector for button {match['btnIndex']}: {selector['value']}")
+            try:
+                print("  🖱️ Attempting to click...")
+                locator = page.locator(f'[data-loan-candidate="{match["btnIndex"]}"]').first
+                # click() auto-waits for the element to be visible, enabled and stable
+                await locator.click(timeout=5000)
+            except PlaywrightTimeoutError:
+                print("  ❌ Click timed out, element never became actionable")
+                continue
+            except Exception as e:
+                print(f"  ❌ Click failed: {str(e)}")
+                continue
             
-            await browser.close()
-            return html, snippet
-        except Exception as e:
-            print(f"❌ Error loading page: {e}")
-            await browser.close()
-            raise
+            try:
+                # A click that navigates must not be retried on the next page just
+                # because the new page never goes network-idle
+                try:
+                    await page.wait_for_load_state("domcontentloaded", timeout=5000)
+                except PlaywrightTimeoutError:
+                    pass
+                new_url = page.url
+                print(f"  ✅ Click successful! New URL: {new_url}")
+                
+                # Return early with the successful click result
+                html = await page.content()
+                snippet = await page.evaluate(SNIPPET_JS)
+                print(f"\n📄 Got page content from new page ({len(html)} bytes)")
+                await context.close()
+                return html, snippet
+                
+            except Exception as e:
+                print(f"  ❌ Reading clicked page failed: {str(e)}")
+        
+        # If we get here, no successful clicks were made
+        html = await page.content()
+        snippet = await page.evaluate(SNIPPET_JS)
+        print(f"\n📄 Got page content ({len(html)} bytes)")
+        
+        await context.close()
+        return html, snippet
+    except Exception as e:
+        print(f"❌ Error loading page: {e}")
+        await context.close()
+        raise
 
-async def test_single_site(url: str):
+async def test_single_site(url: str, browser, llm=None):
     """Test landing page detection for a single site"""
     print(f"\n{'='*50}")
     print(f"🏢 Testing website: {url}")
     
-    # Set up our LangGraph for testing
-    llm = GroqClientAsync(model="mixtral-8x7b-32768")
+    # Set up our LangGraph for testing; main() passes one shared LLM client so
+    # every site reuses the same pooled Groq connections
+    llm = llm or GroqClientAsync(model="mixtral-8x7b-32768")
     orchestrator = AsyncLangGraphOrchestrator(llm)
     
     try:
         # Get initial page content and analysis (this will also attempt to find and click buttons)
         print("\n🔍 Analyzing and attempting to find loan-related buttons...")
-        html, snippet = await get_page_content(url)
+        html, snippet = await get_page_content(browser, url)
         print(f"\n📃 Initial content analysis complete")
         
         # Build the initial state with the new page content (after potential click)
@@ -305,14 +334,35 @@ async def main():
         "https://www.limaone.com/"
     ]
     
+    # One Playwright driver and browser for all sites; each URL gets its own context
+    # Headless by default; set HEADFUL=1 to watch the clicks
+    p = await async_playwright().start()
+    browser = await p.chromium.launch(headless=os.getenv("HEADFUL") != "1")
+    llm = GroqClientAsync(model="mixtral-8x7b-32768")
+    # Sites stream through a fixed pool of workers, so at most `workers` pages
+    # (and their Groq calls) are in flight however long the site list gets
+    queue: "asyncio.Queue[str]" = asyncio.Queue()
     for url in sites:
-        try:
-            await test_single_site(url)
-            # Pause between sites to avoid overwhelming
-            await asyncio.sleep(2)
-        except Exception as e:
-            print(f"❌ Error testing {url}: {e}")
-            continue
+        queue.put_nowait(url)
+    workers = 3
+
+    async def worker():
+        while True:
+            try:
+                url = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                await test_single_site(url, browser, llm)
+            except Exception as e:
+                print(f"❌ Error testing {url}: {e}")
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(min(workers, len(sites)))))
+    finally:
+        await llm.aclose()
+        await browser.close()
+        await p.stop()
 
 if __name__ == "__main__":
     # Run the async tests
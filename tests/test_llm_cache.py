@@ -0,0 +1,169 @@
+import asyncio
+
+import pytest
+from utils.llm_cache import JSONCache, LLMCache, make_key
+
+
+class CountingClient:
+    def __init__(self):
+        self.calls = 0
+
+    async def classify_form_or_intermediate(self, snippet: str, url: str = ""):
+        self.calls += 1
+        return {"page_type": "form", "url": url}
+
+    async def extract_form_fields(self, snippet: str):
+        self.calls += 1
+        return {"raw_text": "not json", "confidence": 0.0}
+
+
+def test_make_key_is_deterministic():
+    assert make_key("fn", snippet="a", url="b") == make_key("fn", url="b", snippet="a")
+    assert make_key("fn", snippet="a") != make_key("other", snippet="a")
+
+
+@pytest.mark.asyncio
+async def test_repeated_calls_hit_memory():
+    client = CountingClient()
+    cache = LLMCache(client, path=None)
+    first = await cache.classify_form_or_intermediate("Apply now", url="https://x.test")
+    second = await cache.classify_form_or_intermediate(snippet="Apply now", url="https://x.test")
+    assert first == second
+    assert client.calls == 1
+
+
+def test_memory_layer_is_bounded_lru():
+    cache = LLMCache(CountingClient(), path=None, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # refreshes "a"
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+@pytest.mark.asyncio
+async def test_cache_survives_restart(tmp_path):
+    path = tmp_path / "llm_cache.json"
+    cache = LLMCache(CountingClient(), path)
+    await cache.classify_form_or_intermediate("Apply now")
+    await cache.aflush()
+
+    client = CountingClient()
+    result = await LLMCache(client, path).classify_form_or_intermediate("Apply now")
+    assert result["page_type"] == "form"
+    assert client.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_request():
+    class SlowClient(CountingClient):
+        async def classify_form_or_intermediate(self, snippet: str, url: str = ""):
+            await asyncio.sleep(0.01)
+            return await super().classify_form_or_intermediate(snippet, url)
+
+    client = SlowClient()
+    cache = LLMCache(client, path=None)
+    results = await asyncio.gather(*(cache.classify_form_or_intermediate("Apply now") for _ in range(3)))
+    assert results[0] == results[1] == results[2]
+    assert client.calls == 1
+    assert not cache._inflight
+
+
+@pytest.mark.asyncio
+async def test_unparsed_results_are_not_cached():
+    client = CountingClient()
+    cache = LLMCache(client, path=None)
+    await cache.extract_form_fields("form")
+    await cache.extract_form_fields("form")
+    assert client.calls == 2
+
+
+def test_ttl_entries_expire(tmp_path, monkeypatch):
+    import utils.llm_cache as llm_cache
+
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    cache = JSONCache(tmp_path / "cache.json", ttl=60)
+    cache.set("k", {"text": "hi"})
+    assert JSONCache(tmp_path / "cache.json", ttl=60).get("k") == {"text": "hi"}
+    now[0] += 61
+    assert cache.get("k") is None
+
+
+@pytest.mark.asyncio
+async def test_aset_writes_off_the_event_loop(tmp_path, monkeypatch):
+    import threading
+
+    import utils.io as io
+
+    loop_thread = threading.get_ident()
+    writers = []
+    real = io.save_json_atomic
+    monkeypatch.setattr(io, "save_json_atomic", lambda *a, **k: writers.append(threading.get_ident()) or real(*a, **k))
+    cache = JSONCache(tmp_path / "cache.json")
+    await asyncio.gather(cache.aset("a", 1), cache.aset("b", 2))
+    await cache.aflush()
+    assert writers and loop_thread not in writers
+    assert JSONCache(tmp_path / "cache.json").get("b") == 2
+
+
+@pytest.mark.asyncio
+async def test_aset_batches_writes(tmp_path, monkeypatch):
+    import utils.io as io
+
+    writes = []
+    real = io.save_json_atomic
+    monkeypatch.setattr(io, "save_json_atomic", lambda *a, **k: writes.append(a[1]) or real(*a, **k))
+    cache = JSONCache(tmp_path / "cache.json", flush_delay=0.01)
+    for i in range(20):
+        await cache.aset(str(i), i)
+    assert not writes
+    await asyncio.sleep(0.05)
+    assert len(writes) == 1
+    assert JSONCache(tmp_path / "cache.json").get("19") == 19
+
+
+def test_file_drops_expired_and_least_recent_entries(tmp_path, monkeypatch):
+    import utils.llm_cache as llm_cache
+
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    cache = JSONCache(tmp_path / "cache.json", ttl=60, disk_maxsize=2)
+    cache.set("old", 0)
+    now[0] += 61
+    cache.set("a", 1)
+    assert "old" not in cache._disk
+    cache.set("b", 2)
+    cache.set("c", 3)
+    reloaded = JSONCache(tmp_path / "cache.json", ttl=60, disk_maxsize=2)
+    assert reloaded.get("a") is None and reloaded.get("c") == 3
+
+
+@pytest.mark.asyncio
+async def test_key_covers_html_past_the_first_2000_chars():
+    class HtmlClient(CountingClient):
+        async def find_next_or_submit_button(self, html: str, snippet: str):
+            self.calls += 1
+            return {"selector": html[-10:]}
+
+    client = HtmlClient()
+    cache = LLMCache(client, path=None)
+    header = "<header>" + "x" * 2000 + "</header>"
+    first = await cache.find_next_or_submit_button(header + "<form id=a>", "Next")
+    second = await cache.find_next_or_submit_button(header + "<form id=b>", "Next")
+    assert first != second
+    assert client.calls == 2
+
+
+def test_llm_cache_entries_expire_like_the_groq_cache(tmp_path, monkeypatch):
+    import utils.llm_cache as llm_cache
+
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    monkeypatch.delenv("GROQ_CACHE_TTL", raising=False)
+    cache = LLMCache(CountingClient(), tmp_path / "llm_cache.json")
+    assert cache.ttl == 604800
+    cache.set("k", {"page_type": "form"})
+    now[0] += 604801
+    assert LLMCache(CountingClient(), tmp_path / "llm_cache.json").get("k") is None
@@ -0,0 +1,41 @@
+from utils import parser
+from utils.parser import extract_forms, html_to_text
+
+FORM_HTML = """
+<html><head><title>Apply</title><style>p {}</style></head><body>
+<p> Business loan </p><script>track()</script>
+<form action="/apply" method="post">
+  <input name="email" type="email" required>
+  <select name="amount"><option>10000</option></select>
+  <textarea id="notes"></textarea>
+</form>
+</body></html>
+"""
+
+def test_html_to_text_skips_non_visible_tags():
+    text = html_to_text(FORM_HTML)
+    assert "Business loan" in text
+    assert "track()" not in text and "p {}" not in text
+    assert html_to_text(FORM_HTML, limit=8) == text[:8]
+
+def test_extract_forms_reads_inputs():
+    forms = extract_forms(FORM_HTML)
+    assert len(forms) == 1
+    assert forms[0]["action"] == "/apply" and forms[0]["method"] == "post"
+    assert [(i["tag"], i["type"], i["name"]) for i in forms[0]["inputs"]] == [
+        ("input", "email", "email"),
+        ("select", "select", "amount"),
+        ("textarea", "textarea", None),
+    ]
+
+def test_results_are_memoized_by_content(monkeypatch):
+    parser.invalidate()
+    calls = []
+    real = parser._extract_forms
+    monkeypatch.setattr(parser, "_extract_forms", lambda html: calls.append(html) or real(html))
+    first = extract_forms(FORM_HTML)
+    assert extract_forms("".join(FORM_HTML)) is first
+    assert len(calls) == 1
+    parser.invalidate()
+    extract_forms(FORM_HTML)
+    assert len(calls) == 2
@@ -16,3 +16,31 @@ def test_rank_selectors():
     assert ranked
     top = ranked[0]
     assert "selector" in top
+
+def test_rank_selectors_scores_every_matching_rule():
+    sm = SelectorManager()
+    cands = [
+        {"selector": "button.cta", "text": "Apply"},
+        # data-testid (90) + data- (60) + button with text (55)
+        {"selector": "button[data-testid='apply']", "text": "Apply"},
+        # [role= (65) + a[ with text (55)
+        {"selector": "a[role='button']", "text": "Apply"},
+    ]
+    ranked = sm.rank_selectors(cands)
+    assert [c["selector"] for c in ranked] == [
+        "button[data-testid='apply']",
+        "a[role='button']",
+        "button.cta",
+    ]
+
+def test_choose_best_matches_rank_order():
+    sm = SelectorManager()
+    cands = [
+        {"selector": "a.apply"},
+        {"selector": "button.apply"},
+        {"selector": "#apply-now"},
+    ]
+    assert sm.choose_best(cands) == sm.rank_selectors(cands)[0]
+    # Ties keep the earliest candidate
+    assert sm.choose_best(cands[:2]) is cands[0]
+    assert sm.choose_best([]) is None
@@ -1,4 +1,5 @@
 import pytest
+import pytest_asyncio
 from pathlib import Path
 import asyncio
 import sys
@@ -9,13 +10,12 @@ from unittest.mock import AsyncMock, MagicMock
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from agents.orchestrator import AsyncLangGraphOrchestrator
-from playwright.async_api import async_playwright
 from llm.groq_client import GroqClientAsync
 
 # Create a mock GroqClient for testing
 class MockGroqClient(GroqClientAsync):
     def __init__(self):
-        pass
+        super().__init__(api_key="test-key")
     
     async def classify_form_or_intermediate(self, snippet: str, url: str):
         return {"page_type": "form"}
@@ -23,11 +23,22 @@ class MockGroqClient(GroqClientAsync):
     async def find_loan_application_nav(self, snippet: str):
         return {"loan_application_buttons": []}
 
-@pytest.mark.asyncio
-async def test_try_selectors_with_valid_button():
+@pytest_asyncio.fixture(loop_scope="session")
+async def orchestrator(browser, monkeypatch):
+    """Orchestrator on the session browser; aclose leaves the browser running"""
+    # Keep both LLM caches in memory so test runs never write under data/
+    monkeypatch.setenv("GROQ_CACHE_PATH", "")
+    groq = MockGroqClient()
+    orch = AsyncLangGraphOrchestrator(groq=groq, browser=browser, llm_cache_path=None)
+    yield orch
+    try:
+        await orch.aclose()
+    finally:
+        await groq.aclose()
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_try_selectors_with_valid_button(orchestrator):
     """Test that _try_selectors works with a valid button selector"""
-    mock_groq = MockGroqClient()
-    orchestrator = AsyncLangGraphOrchestrator(groq=mock_groq)
     url = "https://brooklynfundinggroup.com/apply-now/"
     selectors = [
         {
@@ -35,7 +46,7 @@ async def test_try_selectors_with_valid_button():
             "text": "Apply Now"
         },
         {
-            "selector": '//*[contains(text(),"Apply for Your First Loan")]',
+            "selector": 'text=Apply for Your First Loan',
             "text": "Apply for Your First Loan"
         }
     ]
@@ -45,13 +56,13 @@ async def test_try_selectors_with_valid_button():
     assert "url" in result
     assert "html" in result
     assert "selector" in result
-    assert result["selector"] in [s["selector"] for s in selectors]
+    # Clicks made through the text locator report the equivalent text= selector
+    reusable = [s["selector"] for s in selectors] + [f'text={s["text"]}' for s in selectors]
+    assert result["selector"] in reusable
 
-@pytest.mark.asyncio
-async def test_try_selectors_with_invalid_selector():
+@pytest.mark.asyncio(loop_scope="session")
+async def test_try_selectors_with_invalid_selector(orchestrator):
     """Test that _try_selectors handles invalid selectors gracefully"""
-    mock_groq = MockGroqClient()
-    orchestrator = AsyncLangGraphOrchestrator(groq=mock_groq)
     url = "https://brooklynfundinggroup.com/apply-now/"
     selectors = [
         {
@@ -63,11 +74,9 @@ async def test_try_selectors_with_invalid_selector():
     result = await orchestrator._try_selectors(url, selectors, {})
     assert result is None
 
-@pytest.mark.asyncio
-async def test_try_selectors_with_multiple_selectors():
+@pytest.mark.asyncio(loop_scope="session")
+async def test_try_selectors_with_multiple_selectors(orchestrator):
     """Test that _try_selectors tries multiple selectors in order"""
-    mock_groq = MockGroqClient()
-    orchestrator = AsyncLangGraphOrchestrator(groq=mock_groq)
     url = "https://brooklynfundinggroup.com/apply-now/"
     selectors = [
         {
@@ -75,7 +84,7 @@ async def test_try_selectors_with_multiple_selectors():
             "text": "Does Not Exist"
         },
         {
-            "selector": '//*[contains(text(),"Apply for Your First Loan")]',
+            "selector": 'text=Apply for Your First Loan',
             "text": "Apply for Your First Loan"
         }
     ]
@@ -84,15 +93,13 @@ async def test_try_selectors_with_multiple_selectors():
     assert result is not None
     assert result["selector"] == selectors[1]["selector"]
 
-@pytest.mark.asyncio
-async def test_try_selectors_element_state():
+@pytest.mark.asyncio(loop_scope="session")
+async def test_try_selectors_element_state(orchestrator):
     """Test that _try_selectors properly checks element state before clicking"""
-    mock_groq = MockGroqClient()
-    orchestrator = AsyncLangGraphOrchestrator(groq=mock_groq)
     url = "https://brooklynfundinggroup.com/apply-now/"
     selectors = [
         {
-            "selector": '//*[contains(text(),"Apply for Your First Loan")]',
+            "selector": 'text=Apply for Your First Loan',
             "text": "Apply for Your First Loan"
         }
     ]
@@ -106,15 +113,13 @@ async def test_try_selectors_element_state():
     assert result["enabled"] is True
     assert "bbox" in result  # bounding box information
 
-@pytest.mark.asyncio
-async def test_try_selectors_already_clicked():
+@pytest.mark.asyncio(loop_scope="session")
+async def test_try_selectors_already_clicked(orchestrator):
     """Test that _try_selectors respects already_clicked list"""
-    mock_groq = MockGroqClient()
-    orchestrator = AsyncLangGraphOrchestrator(groq=mock_groq)
     url = "https://brooklynfundinggroup.com/apply-now/"
     selectors = [
         {
-            "selector": '//*[contains(text(),"Apply for Your First Loan")]',
+            "selector": 'text=Apply for Your First Loan',
             "text": "Apply for Your First Loan"
         }
     ]
@@ -124,8 +129,8 @@ async def test_try_selectors_already_clicked():
     assert result1 is not None
     
     # Second click with same selector in already_clicked should not click
-    xpath_selector = f'//*[contains(text(),"{selectors[0]["text"]}")]'
-    state = {"already_clicked": [xpath_selector]}
+    text_selector = f'text={selectors[0]["text"]}'
+    state = {"already_clicked": [text_selector]}
     result2 = await orchestrator._try_selectors(url, selectors, state)
     assert result2 is None
 
@@ -2,23 +2,30 @@
 I/O helpers to save JSON atomically.
 """
 
-import json
+import asyncio
+import orjson
+import os
 from pathlib import Path
-import tempfile
-import shutil
+import threading
 import logging
 from typing import Any, Union
 
 logger = logging.getLogger(__name__)
 
+# NON_STR_KEYS keeps json.dump's behaviour of writing int/float dict keys as strings
+_COMPACT_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+_DUMP_OPTIONS = _COMPACT_OPTIONS | orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE
 
-def save_json_atomic(obj: Any, dest: Union[str, Path]) -> None:
+
+def save_json_atomic(obj: Any, dest: Union[str, Path], compact: bool = False) -> None:
     """
     Atomically save an object as JSON to a destination file.
     
     Args:
         obj: The object to serialize to JSON
         dest: Destination file path as string or Path
+        compact: Skip indentation and key sorting, for machine-only files
+            that are rewritten often and would otherwise grow by the whitespace
         
     Raises:
         OSError: If file operations fail
@@ -27,17 +34,40 @@ def save_json_atomic(obj: Any, dest: Union[str, Path]) -> None:
     try:
         dest = Path(dest)
         dest.parent.mkdir(parents=True, exist_ok=True)
-        
-        with tempfile.NamedTemporaryFile("w", delete=False, dir=str(dest.parent), suffix=".tmp") as tf:
-            try:
-                json.dump(obj, tf, indent=2)
-                tmp = tf.name
-            except TypeError as e:
-                raise TypeError(f"Object is not JSON serializable: {e}")
-                
-        shutil.move(tmp, str(dest))
+
+        # Serialize up front so a bad object never leaves a stray temp file behind
+        try:
+            buf = orjson.dumps(obj, option=_COMPACT_OPTIONS if compact else _DUMP_OPTIONS)
+        except TypeError as e:
+            raise TypeError(f"Object is not JSON serializable: {e}")
+
+        # Sibling temp name unique per process and thread, so concurrent writers
+        # of one file never share a temp and the final os.replace stays atomic
+        tmp = dest.with_name(f"{dest.name}.tmp.{os.getpid()}.{threading.get_ident()}")
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            view = memoryview(buf)
+            while view:
+                view = view[os.write(fd, view):]
+            # Data must be on disk before the rename, or a crash can leave an empty file
+            os.fsync(fd)
+        except BaseException:
+            os.close(fd)
+            tmp.unlink(missing_ok=True)
+            raise
+        os.close(fd)
+
+        os.replace(tmp, dest)
         logger.info("Saved JSON to %s", dest)
         
     except OSError as e:
         logger.error("Failed to save JSON to %s: %s", dest, e)
-        raise
\ No newline at end of file
+        raise
+
+
+async def save_json_atomic_async(obj: Any, dest: Union[str, Path], compact: bool = False) -> None:
+    """
+    Run save_json_atomic in a worker thread so serialization and the disk
+    flush do not block the event loop.
+    """
+    await asyncio.to_thread(save_json_atomic, obj, dest, compact)
@@ -0,0 +1,241 @@
+"""
+LLM response cache keyed by a sha256 of the call's inputs.
+
+Wraps a GroqClientAsync so repeated calls on the same snippet/url/html are
+served from memory, then from a JSON file on disk, before hitting the API.
+Identical calls that are already in flight share one API request.
+Any attribute that is not a cached method is delegated to the wrapped client.
+
+JSONCache is the underlying store; GroqClientAsync also uses it directly to
+cache raw chat completions.
+"""
+
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+import orjson
+
+from utils.io import save_json_atomic, save_json_atomic_async
+
+logger = logging.getLogger(__name__)
+
+# Client methods whose results depend only on their snippet/url/html inputs
+CACHED_METHODS = (
+    "classify_form_or_intermediate",
+    "find_loan_application_nav",
+    "analyze_intermediate_options",
+    "extract_form_fields",
+    "find_next_or_submit_button",
+)
+
+
+def make_key(fn: str, **parts: Any) -> str:
+    """Deterministic cache key for a call to `fn` with the given inputs."""
+    payload = {"fn": fn, **parts}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _cacheable(result: Any) -> bool:
+    # Empty results and unparsed LLM output are failures worth retrying later
+    if not result:
+        return False
+    return not (isinstance(result, dict) and "raw_text" in result)
+
+
+class JSONCache:
+    """
+    Key/value store with a bounded in-memory LRU in front of a JSON file.
+
+    With `ttl` set (seconds), entries are stored as {"expires", "value"} and
+    treated as missing once expired; without it values are stored as-is.
+    The file keeps at most `disk_maxsize` entries, least recently used first
+    out. aset batches writes made within `flush_delay` seconds into one;
+    await aflush() before exiting so the last batch is not lost.
+    """
+
+    def __init__(self, path: Union[str, Path, None], maxsize: int = 512, ttl: Optional[float] = None,
+                 disk_maxsize: int = 4096, flush_delay: float = 1.0):
+        self.path = Path(path) if path else None
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.disk_maxsize = disk_maxsize
+        self.flush_delay = flush_delay
+        # In-process LRU front; the JSON file behind it is the long-term store
+        self._mem: "OrderedDict[str, Any]" = OrderedDict()
+        self._disk: "Optional[OrderedDict[str, Any]]" = None
+        self._dirty = False
+        self._flush_task: "Optional[asyncio.Task[None]]" = None
+        # Serializes async writes so an older snapshot never replaces a newer one
+        self._write_lock = asyncio.Lock()
+
+    def _load_disk(self) -> "OrderedDict[str, Any]":
+        if self._disk is None:
+            self._disk = OrderedDict()
+            if self.path and self.path.exists():
+                try:
+                    self._disk = OrderedDict(orjson.loads(self.path.read_bytes()))
+                except (OSError, ValueError) as e:
+                    logger.warning("Ignoring unreadable LLM cache %s: %s", self.path, e)
+                self._prune()
+        return self._disk
+
+    def _prune(self) -> None:
+        """Drop expired entries and the least recently used ones past disk_maxsize."""
+        disk = self._disk
+        if self.ttl is not None:
+            now = time.time()
+            # Entries without an expiry predate the TTL and count as expired
+            for key in [k for k, entry in disk.items()
+                        if not isinstance(entry, dict) or entry.get("expires", 0) < now]:
+                del disk[key]
+        while len(disk) > self.disk_maxsize:
+            disk.popitem(last=False)
+
+    def _remember(self, key: str, value: Any) -> None:
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        if len(self._mem) > self.maxsize:
+            self._mem.popitem(last=False)
+
+    def _unwrap(self, key: str, entry: Any) -> Optional[Any]:
+        if self.ttl is None:
+            return entry
+        if entry["expires"] < time.time():
+            self._mem.pop(key, None)
+            return None
+        return entry["value"]
+
+    def get(self, key: str) -> Optional[Any]:
+        if key in self._mem:
+            self._mem.move_to_end(key)
+            return self._unwrap(key, self._mem[key])
+        disk = self._load_disk()
+        if key in disk:
+            disk.move_to_end(key)
+            self._remember(key, disk[key])
+            return self._unwrap(key, disk[key])
+        return None
+
+    def _store(self, key: str, value: Any) -> bool:
+        """Record the entry; True when it still has to be written to the file."""
+        entry = value if self.ttl is None else {"expires": time.time() + self.ttl, "value": value}
+        self._remember(key, entry)
+        if not self.path:
+            return False
+        disk = self._load_disk()
+        disk[key] = entry
+        disk.move_to_end(key)
+        if len(disk) > self.disk_maxsize:
+            disk.popitem(last=False)
+        return True
+
+    def _snapshot(self) -> Dict[str, Any]:
+        self._prune()
+        self._dirty = False
+        return dict(self._disk)
+
+    def set(self, key: str, value: Any) -> None:
+        """Store and write through synchronously; coroutines should await aset instead."""
+        if self._store(key, value):
+            # Never read by people, so skip indentation
+            save_json_atomic(self._snapshot(), self.path, compact=True)
+
+    async def aset(self, key: str, value: Any) -> None:
+        """Store, and schedule a batched write of the file in a worker thread."""
+        if not self._store(key, value):
+            return
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_delay)
+        # Past the sleep, an explicit aflush must not cancel this write
+        self._flush_task = None
+        await self.aflush()
+
+    async def aflush(self) -> None:
+        """Write pending aset entries now, off the event loop."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        async with self._write_lock:
+            if not self._dirty:
+                return
+            try:
+                # Snapshot on the loop so the worker never sees the dict mid-update
+                await save_json_atomic_async(self._snapshot(), self.path, compact=True)
+            except BaseException:
+                self._dirty = True
+                raise
+
+
+class LLMCache(JSONCache):
+    def __init__(self, client: Any, path: Union[str, Path, None] = Path("data") / "llm_cache.json", maxsize: int = 512,
+                 ttl: Optional[float] = None):
+        # Same lifetime as the raw completion cache so a page that changed is re-asked
+        if ttl is None:
+            ttl = int(os.getenv("GROQ_CACHE_TTL", "604800"))
+        super().__init__(path, maxsize=maxsize, ttl=ttl)
+        self._client = client
+        # Misses currently being computed, so concurrent identical calls (e.g. a
+        # speculative classification and the node that awaits it) share one request
+        self._inflight: Dict[str, "asyncio.Task[Any]"] = {}
+
+    async def get_or_compute(self, fn: str, compute: Callable[[], Awaitable[Any]], **parts: Any) -> Any:
+        """Return the cached result for (fn, parts) or await `compute` and store it."""
+        key = make_key(fn, **parts)
+        hit = self.get(key)
+        if hit is not None:
+            logger.debug("LLM cache hit for %s", fn)
+            return hit
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute_and_store(key, compute))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            logger.debug("Joining in-flight LLM call for %s", fn)
+        # Shielded so a cancelled caller does not cancel the request for the others
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: "asyncio.Task[Any]") -> None:
+        self._inflight.pop(key, None)
+        # Every waiter may have been cancelled; mark the error as retrieved so
+        # asyncio does not report it as never retrieved
+        if not task.cancelled():
+            task.exception()
+
+    async def _compute_and_store(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        result = await compute()
+        if _cacheable(result):
+            await self.aset(key, result)
+        return result
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if name not in CACHED_METHODS:
+            return attr
+
+        async def cached(*args, **kwargs):
+            bound = inspect.signature(attr).bind(*args, **kwargs)
+            bound.apply_defaults()
+            call = bound.arguments
+            return await self.get_or_compute(
+                name,
+                lambda: attr(*args, **kwargs),
+                snippet=call.get("snippet", ""),
+                url=call.get("url", ""),
+                # The whole page, not a prefix: forms past a shared header differ
+                html_sha256=hashlib.sha256((call.get("html") or "").encode("utf-8", "surrogatepass")).hexdigest(),
+            )
+
+        return cached
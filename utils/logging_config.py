@@ -6,10 +6,17 @@ import logging
 import sys
 
 
+_FORMATTER = logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s")
+_handler = None
+
+
 def configure_logging(level: int = logging.INFO):
+    """Route root logging to stdout; repeat calls only change the level."""
+    global _handler
     logger = logging.getLogger()
     logger.setLevel(level)
-    ch = logging.StreamHandler(sys.stdout)
-    formatter = logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s")
-    ch.setFormatter(formatter)
-    logger.handlers = [ch]
+    if _handler is not None and _handler in logger.handlers:
+        return
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(_FORMATTER)
+    logger.handlers = [_handler]
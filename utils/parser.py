@@ -1,46 +1,136 @@
 """
-HTML parsing helpers using BeautifulSoup (sync functions).
+HTML parsing helpers using selectolax and lxml (sync functions).
 Used by async nodes — that's fine (pure CPU-bound parsing).
+
+Results are memoized by a hash of the HTML, so the same page is only parsed
+once per helper; call invalidate() to drop them.
 """
 
-from bs4 import BeautifulSoup
-from typing import List, Dict
+from collections import OrderedDict
+from lxml import etree
+from selectolax.lexbor import LexborHTMLParser
+from typing import Any, Hashable, Iterator, List, Dict, Optional
+import hashlib
 import logging
+import sys
 
 logger = logging.getLogger(__name__)
 
+# xxh3 hashes multi-MB pages several times faster than hashlib; blake2b is the fallback
+try:
+    import xxhash
+
+    def _content_hash(data: bytes) -> Hashable:
+        return xxhash.xxh3_128_intdigest(data)
+except ImportError:
+    def _content_hash(data: bytes) -> Hashable:
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+_NON_VISIBLE_TAGS = ("script", "style", "noscript")
+
+# Attributes BeautifulSoup returned as lists of tokens; kept that way for form inputs
+_MULTI_VALUED_ATTRS = frozenset({"class", "accesskey", "dropzone"})
+
+# Parse results keyed by (helper, args, content hash); the HTML itself is not retained
+_RESULTS_MAXSIZE = 256
+_results: "OrderedDict[Hashable, Any]" = OrderedDict()
+_MISSING = object()
+
+
+def _memoized(kind: str, html: str, extra: Hashable, compute) -> Any:
+    data = html.encode("utf-8", "surrogatepass") if isinstance(html, str) else bytes(html)
+    key = (kind, extra, _content_hash(data))
+    result = _results.get(key, _MISSING)
+    if result is _MISSING:
+        result = compute()
+        _results[key] = result
+        if len(_results) > _RESULTS_MAXSIZE:
+            _results.popitem(last=False)
+    else:
+        _results.move_to_end(key)
+    return result
+
+
+def invalidate() -> None:
+    """Drop every memoized html_to_text / extract_forms result."""
+    _results.clear()
+
+
+def _visible_lines(root) -> Iterator[str]:
+    """Non-empty stripped text lines under root in document order, skipping script/style/noscript."""
+    for node in root.traverse(include_text=True, skip_empty=True):
+        if node.tag == "-text" and node.parent.tag not in _NON_VISIBLE_TAGS:
+            for line in node.text(deep=False).splitlines():
+                line = line.strip()
+                if line:
+                    yield line
 
-def html_to_text(html: str) -> str:
-    soup = BeautifulSoup(html, "html.parser")
-    for s in soup(["script", "style", "noscript"]):
-        s.decompose()
-    text = soup.get_text(separator="\n", strip=True)
-    text = "\n".join([line.strip() for line in text.splitlines() if line.strip()])
-    return text
+
+def html_to_text(html: str, limit: Optional[int] = None) -> str:
+    return _memoized("text", html, limit, lambda: _html_to_text(html, limit))
+
+
+def _html_to_text(html: str, limit: Optional[int]) -> str:
+    tree = LexborHTMLParser(html)
+    if tree.root is None:
+        return ""
+    if limit is not None:
+        # Callers only keep a prefix, so stop walking the tree once it is filled
+        lines, size = [], 0
+        for line in _visible_lines(tree.root):
+            lines.append(line)
+            size += len(line) + 1
+            if size >= limit:
+                break
+        return "\n".join(lines)[:limit]
+    tree.strip_tags(list(_NON_VISIBLE_TAGS))
+    text = tree.root.text(separator="\n", strip=True)
+    return "\n".join([stripped for line in text.splitlines() if (stripped := line.strip())])
 
 
 def extract_forms(html_or_text: str) -> List[Dict]:
+    """Forms with their inputs; the returned list is shared between callers, so treat it as read-only."""
+    return _memoized("forms", html_or_text, None, lambda: _extract_forms(html_or_text))
+
+
+def _lxml_root(html: str):
+    """Parse html with libxml2's HTML parser; None when there is no document at all."""
+    # feed() accepts str input even when the markup carries an XML encoding declaration
+    parser = etree.HTMLParser()
+    parser.feed(html)
+    return parser.close()
+
+
+def _extract_forms(html_or_text: str) -> List[Dict]:
+    # Only the parse can fail on bad input; errors in the walk below are bugs
     try:
-        soup = BeautifulSoup(html_or_text, "html.parser")
-        forms = []
-        for f in soup.find_all("form"):
-            inputs = []
-            for inp in f.find_all(["input", "select", "textarea"]):
-                attrs = dict(inp.attrs)
-                input_type = attrs.get("type", "text") if inp.name == "input" else inp.name
-                inputs.append({
-                    "tag": inp.name,
-                    "type": input_type,
-                    "name": attrs.get("name"),
-                    "id": attrs.get("id"),
-                    "attrs": attrs
-                })
-            forms.append({
-                "action": f.get("action"),
-                "method": f.get("method"),
-                "inputs": inputs
-            })
-        return forms
-    except Exception as e:
+        root = _lxml_root(html_or_text)
+    except (etree.LxmlError, ValueError) as e:
         logger.exception("Failed to parse forms: %s", e)
         return []
+    if root is None:
+        return []
+    forms = []
+    # lxml's C iterators walk each form's subtree once for all three tags
+    for f in root.iter("form"):
+        inputs = []
+        for inp in f.iter("input", "select", "textarea"):
+            # Interned names share one string per attribute across the memoized results
+            attrs = {
+                sys.intern(k): v.split() if k in _MULTI_VALUED_ATTRS else v
+                for k, v in inp.attrib.items()
+            }
+            input_type = attrs.get("type", "text") if inp.tag == "input" else inp.tag
+            inputs.append({
+                "tag": inp.tag,
+                "type": input_type,
+                "name": attrs.get("name"),
+                "id": attrs.get("id"),
+                "attrs": attrs
+            })
+        forms.append({
+            "action": f.get("action"),
+            "method": f.get("method"),
+            "inputs": inputs
+        })
+    return forms
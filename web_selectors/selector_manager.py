@@ -3,80 +3,82 @@ SelectorManager: lightweight selector heuristics for async flow.
 """
 
 import logging
+from functools import lru_cache
 from typing import Optional, List, Dict
 
 logger = logging.getLogger(__name__)
 
+# (substrings, weight): a rule scores once if any of its substrings occurs
+_SCORE_RULES = (
+    (("data-test",), 90),  # Test-specific attributes, also covers data-testid
+    (("name=", "for="), 80),  # Form-specific attributes
+    (("aria-label",), 70),  # Accessibility attributes
+    (("[role=",), 65),
+    (("data-",), 60),  # Data attributes
+    (("nth-child", "nth-of-type"), 30),  # Position-based XPath
+)
+
+
+def _score(cand: Dict) -> int:
+    # Text, not just its presence, is part of the key: the exact-match rule embeds it
+    return _score_selector(cand.get("selector", ""), cand.get("text", ""))
+
+
+# The same selectors recur across pages built from one template
+@lru_cache(maxsize=4096)
+def _score_selector(sel: str, text: str) -> int:
+    # Highest priority: Unique identifiers
+    s = 100 if sel.lstrip().startswith("#") else 0  # ID selectors are most reliable
+
+    for needles, weight in _SCORE_RULES:
+        for needle in needles:
+            if needle in sel:
+                s += weight
+                break
+
+    # Text matching with button/link context
+    if text:
+        lowered = sel.lower()
+        if "button" in lowered or "a[" in sel or "link" in lowered:
+            s += 55
+
+    # Class-based selectors
+    dots = sel.count(".")
+    if dots == 1:  # Single class
+        s += 50
+    elif dots > 1:  # Multiple classes
+        s += 40
+
+    # Text content exact match
+    if text and f'text()="{text}"' in sel:
+        s += 45
+    elif text and "contains(text()" in sel:
+        s += 35
+
+    # Penalties
+    if len(sel) > 150:  # Very long selectors
+        s -= 20
+    if sel.count("/") > 5:  # Deep XPath
+        s -= 15
+    if sel.count(" > ") > 3:  # Deep CSS path
+        s -= 15
+
+    return s
+
 
 class SelectorManager:
     def __init__(self):
         self.registry = {}
 
     def rank_selectors(self, candidates: List[Dict]) -> List[Dict]:
-        def score(cand):
-            s = 0
-            sel = cand.get("selector", "")
-            text = cand.get("text", "")
-            
-            # Highest priority: Unique identifiers
-            if sel.strip().startswith("#"):
-                s += 100  # ID selectors are most reliable
-                
-            # Test-specific attributes
-            if "data-testid" in sel or "data-test" in sel:
-                s += 90
-                
-            # Form-specific attributes
-            if "name=" in sel or "for=" in sel:
-                s += 80
-                
-            # Accessibility attributes
-            if "aria-label" in sel:
-                s += 70
-            if "[role=" in sel:
-                s += 65
-                
-            # Data attributes
-            if "data-" in sel:
-                s += 60
-            
-            # Text matching with button/link context
-            if text and ("button" in sel.lower() or "a[" in sel or "link" in sel.lower()):
-                s += 55
-                
-            # Class-based selectors
-            if sel.count(".") == 1:  # Single class
-                s += 50
-            elif sel.count(".") > 1:  # Multiple classes
-                s += 40
-                
-            # Position-based XPath
-            if "nth-child" in sel or "nth-of-type" in sel:
-                s += 30
-                
-            # Text content exact match
-            if text and f'text()="{text}"' in sel:
-                s += 45
-            elif text and "contains(text()" in sel:
-                s += 35
-                
-            # Penalties
-            if len(sel) > 150:  # Very long selectors
-                s -= 20
-            if sel.count("/") > 5:  # Deep XPath
-                s -= 15
-            if sel.count(" > ") > 3:  # Deep CSS path
-                s -= 15
-                
-            return s
-
-        ranked = sorted(candidates, key=lambda c: -score(c))
-        logger.debug("Ranked selectors: %s", ranked)
+        ranked = sorted(candidates, key=lambda c: -_score(c))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Ranked selectors: %s", ranked)
         return ranked
 
     def choose_best(self, candidates: List[Dict]) -> Optional[Dict]:
-        ranked = self.rank_selectors(candidates)
-        return ranked[0] if ranked else None
+        # max() keeps the first of equal scores, matching the stable sort's ranked[0]
+        return max(candidates, key=_score, default=None)
 
     def generate_selector_from_attrs(self, tag: str, attrs: Dict[str, str]) -> str:
         if "id" in attrs: